@@ -1,6 +1,5 @@
 import streamlit as st
 import base64
-from streamlit_extras.switch_page_button import switch_page
 
 if "selected_option" not in st.session_state:
     st.session_state.selected_option = None
@@ -92,9 +91,9 @@ if "selected_option" not in st.session_state:
 #        </style>
 #        """,
 #        unsafe_allow_html=True
-    )
+#    )
 
-set_bg()
+#set_bg()
 
 # Header section
 st.markdown("""
@@ -0,0 +1,113 @@
+import re
+
+# Sub-score categories, in display order.
+ATS_CATEGORIES = ["Keyword Matching", "Experience Relevance", "Education Alignment", "Skills Coverage", "Formatting"]
+
+def analyze_formatting(resume_text):
+    """Analyze resume formatting by checking standard sections"""
+    sections = ["experience", "education", "skills", "projects"]
+    found = sum(1 for section in sections if re.search(fr"\b{section}\b", resume_text, re.I))
+    return min(100, int((found / len(sections)) * 100 + 20))  # Bonus for basic structure
+
+def generate_ats_scorecard(resume_text, job_desc):
+    """Generate a dynamic ATS scorecard based on text matching"""
+    resume_text = resume_text.lower()
+    job_desc = job_desc.lower()
+
+    # Extract keyword-like terms (simple version)
+    keywords = set(re.findall(r'\b\w+\b', job_desc))
+    resume_words = set(re.findall(r'\b\w+\b', resume_text))
+
+    # Keyword Matching Score
+    matched_keywords = keywords.intersection(resume_words)
+    keyword_score = int((len(matched_keywords) / len(keywords)) * 100) if keywords else 0
+
+    # Experience Relevance (basic heuristic based on job role mention)
+    role_keywords = ["experience", "developed", "worked", "managed", "projects"]
+    experience_matches = sum(1 for word in role_keywords if word in resume_text)
+    experience_score = min(100, experience_matches * 20)
+
+    # Education Alignment
+    education_keywords = ["bachelor", "master", "degree", "university", "college", "b.tech", "m.tech"]
+    education_matches = sum(1 for word in education_keywords if word in resume_text)
+    education_score = min(100, education_matches * 20)
+
+    # Skills Coverage: look for common tech skills from JD in resume
+    skills = re.findall(r'\b(python|java|sql|machine learning|data analysis|aws|azure|cloud|docker|react|node)\b', job_desc)
+    skills = set(skills)
+    matched_skills = sorted(skill for skill in skills if skill in resume_text)
+    missing_skills = sorted(skills - set(matched_skills))
+    skill_score = int((len(matched_skills) / len(skills)) * 100) if skills else 0
+
+    # Formatting: basic check for key section headings
+    formatting_score = analyze_formatting(resume_text)
+
+    scores = {
+        "Keyword Matching": keyword_score,
+        "Experience Relevance": experience_score,
+        "Education Alignment": education_score,
+        "Skills Coverage": skill_score,
+        "Formatting": formatting_score
+    }
+
+    explanations = {
+        "Keyword Matching": f"{keyword_score}% of keywords from the job description were found in the resume.",
+        "Experience Relevance": f"{experience_score}% relevance based on key experience indicators in your resume.",
+        "Education Alignment": f"{education_score}% alignment with common educational qualifications.",
+        "Skills Coverage": f"{skill_score}% of the technical skills from the job description are present in your resume.",
+        "Formatting": f"{formatting_score}% score based on use of standard sections like Experience, Education, Skills, Projects."
+    }
+
+    overall_score = sum(scores.values()) // len(scores)
+    hiring_probability = min(100, overall_score + 15)
+
+    return {
+        "scores": scores,
+        "explanations": explanations,
+        "overall_score": overall_score,
+        "hiring_probability": hiring_probability,
+        "matched_skills": matched_skills,
+        "missing_skills": missing_skills
+    }
+
+# -------------------- Degraded (no-LLM) fallbacks --------------------
+
+def local_screening_result(resume_text, job_desc, ats_scorecard=None):
+    """Recruiter-style result built only from the ATS scorecard (LLM unavailable)."""
+    ats_scorecard = ats_scorecard or generate_ats_scorecard(resume_text, job_desc)
+    weakest = min(ats_scorecard["scores"], key=ats_scorecard["scores"].get)
+    return {
+        "score": ats_scorecard["overall_score"],
+        "matched_skills": list(ats_scorecard.get("matched_skills", [])),
+        "missing_skills": list(ats_scorecard.get("missing_skills", [])),
+        "reason": (f"Local ATS estimate (AI analysis unavailable): overall {ats_scorecard['overall_score']}/100, "
+                   f"weakest area {weakest} at {ats_scorecard['scores'][weakest]}/100."),
+        "degraded": True
+    }
+
+def local_feedback(ats_scorecard):
+    """Feedback text in the LLM's ### section format, built from the ATS scorecard."""
+    scores = ats_scorecard["scores"]
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    missing = "\n".join(f"* {skill}: Important - Mentioned in the job description but not in the resume"
+                        for skill in ats_scorecard.get("missing_skills", [])) or "No listed technical skills are missing."
+    return f"""### Resume Feedback Summary
+AI feedback is temporarily unavailable, so this is a local ATS estimate only: {ats_scorecard['overall_score']}/100 overall. It will be replaced automatically once the AI provider recovers.
+
+### Detailed Analysis
+1. **Strengths**:
+{chr(10).join(f"   - {c}: {scores[c]}/100" for c in ranked[:2])}
+2. **Weaknesses**:
+{chr(10).join(f"   - {c}: {scores[c]}/100" for c in ranked[-2:])}
+
+### Missing Skills or Keywords
+{missing}
+
+### Suggestions to Improve
+1. Improve {ranked[-1]}: {ats_scorecard['explanations'][ranked[-1]]}
+2. Add more keywords from the job description naturally throughout your resume.
+3. Use standard section headings like 'Work Experience', 'Education', 'Skills'.
+
+### Additional Recommendations
+Re-run the analysis later for detailed AI feedback.
+"""
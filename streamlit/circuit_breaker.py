@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import deque
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# A call counts as a failure when it errors, times out, returns 429/5xx, or
+# takes longer than SLOW_CALL_SECONDS.
+WINDOW_SIZE = 20
+MIN_CALLS = 5
+FAILURE_RATE_THRESHOLD = 0.5
+SLOW_CALL_SECONDS = 20.0
+OPEN_SECONDS = 30.0
+
+# Re-analysis of degraded results: first retry after RETRY_BASE_SECONDS,
+# doubling after each failed attempt up to RETRY_MAX_SECONDS.
+RETRY_BASE_SECONDS = OPEN_SECONDS
+RETRY_MAX_SECONDS = 600.0
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling the provider while the breaker is open."""
+
+
+class CircuitBreaker:
+    """Error-rate/latency circuit breaker around the LLM provider.
+
+    closed     -> calls go through; the last WINDOW_SIZE outcomes are tracked
+    open       -> calls fail immediately for OPEN_SECONDS
+    half_open  -> one probe call is let through; success closes the breaker,
+                  failure re-opens it
+    """
+
+    def __init__(self, window_size=WINDOW_SIZE, min_calls=MIN_CALLS,
+                 failure_rate_threshold=FAILURE_RATE_THRESHOLD,
+                 slow_call_seconds=SLOW_CALL_SECONDS, open_seconds=OPEN_SECONDS):
+        self.min_calls = min_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.open_seconds = open_seconds
+
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window_size)  # (failed, latency)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._last_error = None
+
+    @property
+    def state(self):
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+
+    def _maybe_half_open(self, now):
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probe_in_flight = False
+
+    def _open(self, now, error):
+        self._state = OPEN
+        self._opened_at = now
+        self._probe_in_flight = False
+        self._last_error = error
+
+    def allow_request(self):
+        """True if a call would go through now (does not claim the probe slot)."""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state == CLOSED or (self._state == HALF_OPEN and not self._probe_in_flight)
+
+    def before_call(self):
+        """Claim permission for one call or raise ``CircuitOpenError``."""
+        with self._lock:
+            now = time.monotonic()
+            self._maybe_half_open(now)
+            if self._state == CLOSED:
+                return
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            retry_in = max(0.0, self.open_seconds - (now - self._opened_at))
+            raise CircuitOpenError(
+                f"LLM provider unavailable (circuit open, retry in {retry_in:.0f}s): {self._last_error}")
+
+    def record(self, failed, latency, error=None):
+        """Report the outcome of a call allowed by ``before_call``."""
+        failed = failed or latency > self.slow_call_seconds
+        if failed and error is None and latency > self.slow_call_seconds:
+            error = f"slow response ({latency:.1f}s)"
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                if failed:
+                    self._open(now, error)
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    self._probe_in_flight = False
+                return
+            self._outcomes.append((failed, latency))
+            if failed:
+                self._last_error = error
+            if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+                failures = sum(1 for f, _ in self._outcomes if f)
+                if failures / len(self._outcomes) >= self.failure_rate_threshold:
+                    self._open(now, error)
+
+    def release_probe(self):
+        """Give back a claimed call that never reached the provider."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+
+    def metrics(self):
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            latencies = sorted(l for _, l in self._outcomes)
+            return {
+                "state": self._state,
+                "window_calls": len(self._outcomes),
+                "window_failures": sum(1 for f, _ in self._outcomes if f),
+                "latency_p50_s": round(latencies[len(latencies) // 2], 3) if latencies else 0.0,
+                "last_error": self._last_error,
+            }
+
+
+class RetryBackoff:
+    """Paces re-analysis of degraded results for one session.
+
+    A single timeout or 429 degrades a result without tripping the breaker,
+    so "breaker closed" alone would retry the provider on every rerun. Create
+    one when a result is degraded; ``ready`` then also waits out the backoff.
+    """
+
+    def __init__(self, base=RETRY_BASE_SECONDS, maximum=RETRY_MAX_SECONDS):
+        self.base = base
+        self.maximum = maximum
+        self.delay = base
+        self.last_attempt = time.monotonic()
+
+    def ready(self, breaker=None):
+        if time.monotonic() - self.last_attempt < self.delay:
+            return False
+        return (breaker or get_breaker()).allow_request()
+
+    def attempted(self, succeeded):
+        self.last_attempt = time.monotonic()
+        self.delay = self.base if succeeded else min(self.maximum, self.delay * 2)
+
+
+# ----------------------------------
+# Process-wide instance
+# ----------------------------------
+_breaker = None
+_breaker_lock = threading.Lock()
+
+
+def get_breaker():
+    """The single breaker shared by every session in this Streamlit process."""
+    global _breaker
+    if _breaker is None:
+        with _breaker_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker()
+    return _breaker
@@ -0,0 +1,134 @@
+import hashlib
+import random
+import re
+from collections import defaultdict
+
+# ----------------------------------
+# MinHash / LSH parameters
+# ----------------------------------
+# 64 hash functions split into 16 bands of 4 rows: two documents land in the
+# same bucket with high probability once their shingle Jaccard passes ~0.5,
+# and candidates are then verified against DEFAULT_THRESHOLD.
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(1337)  # fixed seed: signatures are comparable across reruns
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_text(text):
+    """Lower-case, drop punctuation and collapse whitespace so PDF/DOCX copies agree."""
+    return " ".join(re.findall(r"[a-z0-9+#]+", (text or "").lower()))
+
+
+def shingles(text, k=SHINGLE_SIZE):
+    words = normalize_text(text).split()
+    if len(words) <= k:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + k]) for i in range(len(words) - k + 1)}
+
+
+def _hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+
+
+def minhash_signature(text):
+    """MinHash signature (tuple of NUM_PERM ints) of the text's word shingles."""
+    hashes = [_hash(s) for s in shingles(text)]
+    if not hashes:
+        return (_MAX_HASH,) * NUM_PERM
+    return tuple(min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in _PERMS)
+
+
+def estimate_similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def cluster_near_duplicates(texts, threshold=DEFAULT_THRESHOLD):
+    """Group near-duplicate texts.
+
+    Returns a list of clusters; each cluster is a list of ``(index, similarity)``
+    pairs whose first entry is the representative (the longest text) with
+    similarity 1.0; every other member is at least ``threshold`` similar to
+    it. Texts without duplicates come back as singleton clusters.
+    Candidate pairs come from LSH buckets, so the work grows with the number of
+    colliding documents rather than with every pair in the batch.
+    """
+    n = len(texts)
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[rj] = ri
+
+    # Exact copies (after normalisation) short-circuit MinHash entirely.
+    digests = {}
+    canonical = []  # index of the first exact copy of each text
+    for i, text in enumerate(texts):
+        digest = hashlib.sha256(normalize_text(text).encode()).hexdigest()
+        if digest in digests:
+            union(digests[digest], i)
+        else:
+            digests[digest] = i
+        canonical.append(digests[digest])
+
+    unique = list(digests.values())
+    signatures = {i: minhash_signature(texts[i]) for i in unique}
+    buckets = defaultdict(list)
+    for i in unique:
+        sig = signatures[i]
+        for band in range(BANDS):
+            buckets[(band, sig[band * ROWS:(band + 1) * ROWS])].append(i)
+
+    checked = set()
+    for members in buckets.values():
+        for pos, i in enumerate(members):
+            for j in members[pos + 1:]:
+                if (i, j) in checked:
+                    continue
+                checked.add((i, j))
+                if estimate_similarity(signatures[i], signatures[j]) >= threshold:
+                    union(i, j)
+
+    groups = defaultdict(list)
+    for i in range(n):
+        groups[find(i)].append(i)
+
+    # Union-find links chains of edits (A~B, B~C) even when A and C differ, so
+    # each group is split until every member is within threshold of its own
+    # representative; only then may members reuse the representative's result.
+    clusters = []
+    for members in groups.values():
+        remaining = sorted(members)
+        while remaining:
+            rep = max(remaining, key=lambda i: (len(texts[i]), -i))
+            rep_sig = signatures[canonical[rep]]
+            cluster, rest = [(rep, 1.0)], []
+            for i in remaining:
+                if i == rep:
+                    continue
+                if canonical[i] == canonical[rep]:
+                    similarity = 1.0
+                else:
+                    similarity = estimate_similarity(rep_sig, signatures[canonical[i]])
+                if similarity >= threshold:
+                    cluster.append((i, similarity))
+                else:
+                    rest.append(i)
+            clusters.append(cluster)
+            remaining = rest
+    clusters.sort(key=lambda c: c[0][0])
+    return clusters
@@ -0,0 +1,224 @@
+import csv
+import io
+import json
+import tempfile
+
+from ats import ATS_CATEGORIES
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pa = pq = None
+
+# ----------------------------------
+# Export schema
+# ----------------------------------
+# One flat row per candidate. Lists stay lists in JSONL/Parquet and are joined
+# with "; " in CSV.
+ATS_COLUMNS = ["ats_" + c.lower().replace(" ", "_") for c in ATS_CATEGORIES]
+COLUMNS = (
+    ["name", "score", "matched_skills", "missing_skills", "reason",
+     "duplicate_of", "similarity", "degraded", "ats_overall"]
+    + ATS_COLUMNS
+    + ["extract_seconds", "analysis_seconds"]
+)
+LIST_COLUMNS = {"matched_skills", "missing_skills"}
+FLOAT_COLUMNS = {"score", "similarity", "extract_seconds", "analysis_seconds"}
+INT_COLUMNS = {"ats_overall", *ATS_COLUMNS}
+BOOL_COLUMNS = {"degraded"}
+
+PARQUET_ROW_GROUP = 256
+LIST_SEPARATOR = "; "
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def parquet_available():
+    return pq is not None
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def to_row(name, analysis):
+    """Flatten one ``(name, analysis)`` result into an export row."""
+    ats = analysis.get("ats") or {}
+    sub_scores = ats.get("scores", {})
+    timings = analysis.get("timings") or {}
+    row = {
+        "name": name,
+        "score": _to_float(analysis.get("score")),
+        "matched_skills": [str(s) for s in analysis.get("matched_skills") or []],
+        "missing_skills": [str(s) for s in analysis.get("missing_skills") or []],
+        "reason": analysis.get("reason"),
+        "duplicate_of": analysis.get("duplicate_of"),
+        "similarity": _to_float(analysis.get("similarity")),
+        "degraded": bool(analysis.get("degraded")),
+        "ats_overall": _to_int(ats.get("overall_score")),
+        "extract_seconds": _to_float(timings.get("extract_seconds")),
+        "analysis_seconds": _to_float(timings.get("analysis_seconds")),
+    }
+    for category, column in zip(ATS_CATEGORIES, ATS_COLUMNS):
+        row[column] = _to_int(sub_scores.get(category))
+    return row
+
+
+def from_row(row):
+    """Inverse of ``to_row``: rebuild ``(name, analysis)`` for the results view."""
+    analysis = {
+        "score": row.get("score") if row.get("score") is not None else 0,
+        "matched_skills": list(row.get("matched_skills") or []),
+        "missing_skills": list(row.get("missing_skills") or []),
+        "reason": row.get("reason") or "No reason provided.",
+    }
+    if isinstance(analysis["score"], float) and analysis["score"].is_integer():
+        analysis["score"] = int(analysis["score"])
+    if row.get("duplicate_of"):
+        analysis["duplicate_of"] = row["duplicate_of"]
+        analysis["similarity"] = row.get("similarity") or 0.0
+    if row.get("degraded"):
+        analysis["degraded"] = True
+    if row.get("ats_overall") is not None:
+        analysis["ats"] = {
+            "overall_score": row["ats_overall"],
+            "scores": {c: row.get(col) for c, col in zip(ATS_CATEGORIES, ATS_COLUMNS)
+                       if row.get(col) is not None},
+        }
+    timings = {k: row[k] for k in ("extract_seconds", "analysis_seconds") if row.get(k) is not None}
+    if timings:
+        analysis["timings"] = timings
+    return row["name"], analysis
+
+
+class ResultExporter:
+    """Append-only CSV/JSONL/Parquet writer fed one result at a time.
+
+    Rows are written straight to temporary files (Parquet in row groups of
+    ``PARQUET_ROW_GROUP``), so memory stays bounded by one row group however
+    large the candidate pool is.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._csv_file = tempfile.TemporaryFile(mode="w+", encoding="utf-8", newline="")
+        self._csv = csv.DictWriter(self._csv_file, fieldnames=COLUMNS)
+        self._csv.writeheader()
+        self._jsonl_file = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+        self._parquet_file = None
+        self._parquet_writer = None
+        self._pending = []
+        if pq is not None:
+            self._parquet_file = tempfile.TemporaryFile()
+            self._parquet_writer = pq.ParquetWriter(self._parquet_file, _parquet_schema())
+
+    def add(self, name, analysis):
+        row = to_row(name, analysis)
+        self._csv.writerow({k: LIST_SEPARATOR.join(v) if k in LIST_COLUMNS else v
+                            for k, v in row.items()})
+        self._jsonl_file.write(json.dumps(row, ensure_ascii=False) + "\n")
+        if self._parquet_writer is not None:
+            self._pending.append(row)
+            if len(self._pending) >= PARQUET_ROW_GROUP:
+                self._flush_parquet()
+        self.count += 1
+
+    def _flush_parquet(self):
+        if self._pending:
+            self._parquet_writer.write_table(pa.Table.from_pylist(self._pending, schema=_parquet_schema()))
+            self._pending = []
+
+    def close(self):
+        """Finish the Parquet footer; CSV/JSONL stay readable either way."""
+        if self._parquet_writer is not None:
+            self._flush_parquet()
+            self._parquet_writer.close()
+            self._parquet_writer = None
+        self._csv_file.flush()
+        self._jsonl_file.flush()
+
+    def getvalue(self, fmt):
+        """Bytes of the export in ``fmt`` ('csv', 'jsonl' or 'parquet')."""
+        if fmt == "csv":
+            self._csv_file.seek(0)
+            return self._csv_file.read().encode("utf-8")
+        if fmt == "jsonl":
+            self._jsonl_file.seek(0)
+            return self._jsonl_file.read().encode("utf-8")
+        if fmt == "parquet":
+            if self._parquet_file is None:
+                raise RuntimeError("Parquet export needs pyarrow installed.")
+            if self._parquet_writer is not None:
+                raise RuntimeError("Call close() before reading the Parquet export.")
+            self._parquet_file.seek(0)
+            return self._parquet_file.read()
+        raise ValueError(f"Unknown export format: {fmt}")
+
+
+def _parquet_schema():
+    fields = []
+    for column in COLUMNS:
+        if column in LIST_COLUMNS:
+            fields.append(pa.field(column, pa.list_(pa.string())))
+        elif column in FLOAT_COLUMNS:
+            fields.append(pa.field(column, pa.float64()))
+        elif column in INT_COLUMNS:
+            fields.append(pa.field(column, pa.int64()))
+        elif column in BOOL_COLUMNS:
+            fields.append(pa.field(column, pa.bool_()))
+        else:
+            fields.append(pa.field(column, pa.string()))
+    return pa.schema(fields)
+
+
+def export_results(results):
+    """Build a closed exporter from an existing list of ``(name, analysis)`` results."""
+    exporter = ResultExporter()
+    for name, analysis in results:
+        exporter.add(name, analysis)
+    exporter.close()
+    return exporter
+
+
+def load_results(file):
+    """Restore ``(name, analysis)`` results from a CSV, JSONL or Parquet export."""
+    name = getattr(file, "name", "")
+    data = file.read() if hasattr(file, "read") else file
+    if name.endswith(".parquet") or data[:4] == b"PAR1":
+        if pq is None:
+            raise RuntimeError("Reading Parquet exports needs pyarrow installed.")
+        rows = pq.read_table(io.BytesIO(data)).to_pylist()
+    elif name.endswith(".jsonl") or name.endswith(".json"):
+        rows = [json.loads(line) for line in data.decode("utf-8").splitlines() if line.strip()]
+    else:
+        rows = []
+        for raw in csv.DictReader(io.StringIO(data.decode("utf-8"))):
+            row = {}
+            for key, value in raw.items():
+                if key in LIST_COLUMNS:
+                    row[key] = [s for s in value.split(LIST_SEPARATOR) if s] if value else []
+                elif key in FLOAT_COLUMNS:
+                    row[key] = _to_float(value)
+                elif key in INT_COLUMNS:
+                    row[key] = _to_int(value)
+                elif key in BOOL_COLUMNS:
+                    row[key] = value == "True"
+                else:
+                    row[key] = value or None
+            rows.append(row)
+    return [from_row(row) for row in rows]
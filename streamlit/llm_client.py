@@ -0,0 +1,142 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import OPEN, CircuitOpenError, get_breaker
+from llm_providers import HedgedRouter, load_endpoint_config
+from llm_scheduler import BULK, INTERACTIVE, estimate_tokens, get_scheduler
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# (connect, read) seconds: never block indefinitely on a hung provider.
+DEFAULT_TIMEOUT = (5, 45)
+
+# One pooled session for the whole process: TLS connections to the provider
+# are reused across calls and sessions instead of re-handshaking every time.
+_http = requests.Session()
+_http.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_http.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+_last_warm = 0.0
+WARM_INTERVAL_SECONDS = 30.0
+
+_router = None
+_router_lock = threading.Lock()
+
+
+def get_router():
+    """Process-wide hedged router over the configured OpenAI-compatible endpoints.
+
+    Defaults to the single Groq endpoint; set LLM_ENDPOINTS in st.secrets (or
+    $ECHOSAGE_LLM_ENDPOINTS as JSON) to add more, e.g.
+    [{"name": "groq", "url": "...", "inherit_key": true}, {"name": "backup", "url": "...", "api_key": "..."}]
+
+    Only endpoints with ``inherit_key`` receive the caller's (Groq) API key.
+    Entries may also set ``requests_per_minute`` / ``tokens_per_minute``.
+    """
+    global _router
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = HedgedRouter(load_endpoint_config(GROQ_API_URL), http=_http,
+                                       scheduler=get_scheduler())
+    return _router
+
+
+def set_endpoints(endpoints, **router_options):
+    """Replace the endpoint set (e.g. local mock servers); returns the new router."""
+    global _router
+    with _router_lock:
+        if _router is not None:
+            _router.close()
+        _router = HedgedRouter(endpoints, http=_http, scheduler=get_scheduler(), **router_options)
+    return _router
+
+
+def current_session_id():
+    """Streamlit session id of the calling script thread (or a shared fallback)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+    except Exception:
+        ctx = None
+    return ctx.session_id if ctx is not None else "default"
+
+
+def chat_completion(payload, api_key, priority=BULK, timeout=DEFAULT_TIMEOUT, session_id=None):
+    """POST a chat completion through the process-wide scheduler, breaker and router.
+
+    Returns the ``requests.Response`` of whichever endpoint answered first;
+    callers keep their own status handling.
+
+    Raises ``CircuitOpenError`` straight away while the provider is considered
+    down, instead of queueing or waiting on the network.
+    """
+    breaker = get_breaker()
+    breaker.before_call()
+
+    router = get_router()
+    prompt = "".join(m.get("content", "") for m in payload.get("messages", []))
+    tokens = estimate_tokens(prompt, payload.get("max_tokens", 512))
+
+    try:
+        primary, ticket = router.admit(session_id or current_session_id(), priority, tokens)
+    except BaseException:
+        breaker.release_probe()
+        raise
+    if breaker.state == OPEN:
+        # Tripped by other calls while this one was queued.
+        router.release(ticket)
+        raise CircuitOpenError(f"LLM provider unavailable (circuit opened while queued): "
+                               f"{breaker.metrics()['last_error']}")
+
+    outcome = None  # (failed, error) once the provider was actually contacted
+    started = time.monotonic()
+    try:
+        # The router owns the ticket from here: it releases it (and applies
+        # the endpoint's rate-limit headers) when each request returns.
+        response, _ = router.post(payload, api_key, timeout, primary, ticket)
+        failed = response.status_code == 429 or response.status_code >= 500
+        outcome = (failed, f"HTTP {response.status_code}" if failed else None)
+        return response
+    except requests.RequestException as e:
+        outcome = (True, f"{type(e).__name__}: {e}")
+        raise
+    finally:
+        if outcome is None:
+            breaker.release_probe()
+        else:
+            breaker.record(outcome[0], time.monotonic() - started, outcome[1])
+
+
+def provider_unavailable(exc):
+    """True if ``exc`` means the provider is down/slow, so a local fallback applies."""
+    if isinstance(exc, (CircuitOpenError, requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        return exc.response.status_code == 429 or exc.response.status_code >= 500
+    return False
+
+
+def warm_connection(force=False):
+    """Open (or keep alive) pooled connections to the LLM endpoints.
+
+    Cheap HEAD to each API host, at most once per WARM_INTERVAL_SECONDS, so
+    the next chat completion skips DNS + TLS setup. Errors are ignored.
+    """
+    global _last_warm
+    now = time.monotonic()
+    if not force and now - _last_warm < WARM_INTERVAL_SECONDS:
+        return False
+    _last_warm = now
+    warmed = False
+    hosts = {urlsplit(e.url)[:2] for e in get_router().endpoints}
+    for scheme, netloc in hosts:
+        try:
+            _http.head(f"{scheme}://{netloc}/", timeout=5)
+            warmed = True
+        except requests.RequestException:
+            pass
+    return warmed
@@ -0,0 +1,359 @@
+import bisect
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+# ----------------------------------
+# Latency histograms
+# ----------------------------------
+# Log-spaced bucket upper bounds from 25 ms to ~3 min (x1.25 per bucket).
+_BUCKETS = []
+_bound = 0.025
+while _bound < 180:
+    _BUCKETS.append(_bound)
+    _bound *= 1.25
+_BUCKETS.append(float("inf"))
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram; percentiles are bucket upper bounds."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = [0] * len(_BUCKETS)
+        self.count = 0
+        self.errors = 0
+
+    def observe(self, seconds, error=False):
+        with self._lock:
+            self._counts[bisect.bisect_left(_BUCKETS, seconds)] += 1
+            self.count += 1
+            if error:
+                self.errors += 1
+
+    def percentile(self, p):
+        with self._lock:
+            if not self.count:
+                return None
+            target = p * self.count
+            seen = 0
+            for bound, n in zip(_BUCKETS, self._counts):
+                seen += n
+                if seen >= target:
+                    return bound if bound != float("inf") else _BUCKETS[-2]
+        return None
+
+    def error_rate(self):
+        return self.errors / self.count if self.count else 0.0
+
+
+# ----------------------------------
+# Endpoints
+# ----------------------------------
+class Endpoint:
+    """One OpenAI-compatible chat completions endpoint.
+
+    ``model`` left as None falls back to the caller's payload model. The
+    caller's API key is only sent when ``inherit_key`` is set, which is how
+    the default Groq endpoint is set up; every other endpoint needs its own
+    ``api_key`` so the Groq key never leaks to a third party.
+    ``requests_per_minute`` / ``tokens_per_minute`` seed the endpoint's
+    scheduler budget (None keeps the scheduler's free-tier defaults).
+    """
+
+    def __init__(self, name, url, model=None, api_key=None, inherit_key=False,
+                 requests_per_minute=None, tokens_per_minute=None):
+        if not api_key and not inherit_key:
+            raise ValueError(f"Endpoint {name!r} needs an api_key (or inherit_key=True).")
+        self.name = name
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.inherit_key = inherit_key
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.latency = LatencyHistogram()
+
+    def __repr__(self):
+        return f"Endpoint({self.name!r}, {self.url!r}, model={self.model!r})"
+
+    def key_for(self, caller_key):
+        return self.api_key or caller_key
+
+
+def setting(name, default=None):
+    """``st.secrets[name]``, else ``$ECHOSAGE_<name>``, else ``default``."""
+    value = None
+    try:
+        import streamlit as st
+        value = st.secrets.get(name)
+    except Exception:
+        pass
+    if value is None:
+        value = os.getenv(f"ECHOSAGE_{name}")
+    return default if value in (None, "") else value
+
+
+def _int_setting(value):
+    return int(value) if value not in (None, "") else None
+
+
+def endpoints_from_config(config):
+    """Build endpoints from a list of dicts or its JSON.
+
+    Keys: name, url, model, api_key, inherit_key, requests_per_minute,
+    tokens_per_minute.
+    """
+    if isinstance(config, str):
+        config = json.loads(config)
+    return [Endpoint(c.get("name") or c["url"], c["url"], c.get("model"), c.get("api_key"),
+                     bool(c.get("inherit_key")), _int_setting(c.get("requests_per_minute")),
+                     _int_setting(c.get("tokens_per_minute"))) for c in config]
+
+
+def load_endpoint_config(default_url):
+    """Endpoints from st.secrets["LLM_ENDPOINTS"] or $ECHOSAGE_LLM_ENDPOINTS (JSON list).
+
+    Falls back to the single default endpoint when neither is set; its limits
+    come from LLM_REQUESTS_PER_MINUTE / LLM_TOKENS_PER_MINUTE (same lookup).
+    """
+    config = setting("LLM_ENDPOINTS")
+    if config:
+        if not isinstance(config, str):
+            config = [dict(c) for c in config]
+        return endpoints_from_config(config)
+    return [Endpoint("groq", default_url, inherit_key=True,
+                     requests_per_minute=_int_setting(setting("LLM_REQUESTS_PER_MINUTE")),
+                     tokens_per_minute=_int_setting(setting("LLM_TOKENS_PER_MINUTE")))]
+
+
+# ----------------------------------
+# Hedged routing
+# ----------------------------------
+HEDGE_PERCENTILE = 0.9
+MIN_SAMPLES = 10
+DEFAULT_HEDGE_DELAY = 3.0   # seconds, used until an endpoint has MIN_SAMPLES
+MIN_HEDGE_DELAY = 0.05
+# Cap on the hedge delay as a multiple of the median: an endpoint whose stalls
+# pass 1 - HEDGE_PERCENTILE of its calls would otherwise never be hedged.
+HEDGE_MEDIAN_MULTIPLE = 4.0
+
+MAX_WORKERS = 16  # in-flight requests (winners and losers) without a scheduler
+
+
+class HedgedRouter:
+    """Routes a chat completion to the fastest endpoint, hedging slow calls.
+
+    The primary is the endpoint with the lowest median latency (penalised by
+    its error rate; endpoints without enough samples are tried first so every
+    endpoint gets measured). If it has not answered by its own
+    ``hedge_percentile`` latency, one duplicate goes to the next-best endpoint.
+    The first successful response wins.
+
+    requests cannot abort a call that is waiting on the server, so the loser
+    is cancelled only logically: its result is dropped, its connection is
+    closed when it returns, and its latency still feeds the histogram.
+
+    With a ``scheduler`` every request, hedges included, holds a ticket on
+    its endpoint's budget until it returns, losers too. Hedges are only sent
+    when ``try_acquire`` grants one, and the worker pool is sized to the
+    scheduler's concurrency cap, so orphaned losers can never starve primaries.
+    """
+
+    def __init__(self, endpoints, http=None, scheduler=None, hedge_percentile=HEDGE_PERCENTILE,
+                 min_samples=MIN_SAMPLES, default_hedge_delay=DEFAULT_HEDGE_DELAY):
+        if not endpoints:
+            raise ValueError("HedgedRouter needs at least one endpoint.")
+        self.endpoints = list(endpoints)
+        if len({e.name for e in self.endpoints}) != len(self.endpoints):
+            raise ValueError("Endpoint names must be unique; they key the scheduler budgets.")
+        self.http = http or requests.Session()
+        self.scheduler = scheduler
+        self.hedge_percentile = hedge_percentile
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        if scheduler is not None:
+            for endpoint in self.endpoints:
+                scheduler.configure_budget(endpoint.name, endpoint.requests_per_minute,
+                                           endpoint.tokens_per_minute)
+        self.max_workers = scheduler.max_concurrency if scheduler is not None else MAX_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-hedge")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self.hedges_skipped = 0
+
+    def close(self):
+        """Stop the worker pool once in-flight requests return."""
+        self._executor.shutdown(wait=False)
+
+    def ranked(self):
+        def cost(endpoint):
+            hist = endpoint.latency
+            if hist.count < self.min_samples:
+                return (0, hist.count)  # still exploring
+            return (1, hist.percentile(0.5) * (1 + 4 * hist.error_rate()))
+        return sorted(self.endpoints, key=cost)
+
+    def hedge_delay(self, endpoint):
+        if endpoint.latency.count < self.min_samples:
+            return self.default_hedge_delay
+        hist = endpoint.latency
+        delay = min(hist.percentile(self.hedge_percentile), HEDGE_MEDIAN_MULTIPLE * hist.percentile(0.5))
+        return max(MIN_HEDGE_DELAY, delay)
+
+    # ----------------------------------
+    # Scheduler tickets
+    # ----------------------------------
+    def admit(self, session_id, priority, tokens):
+        """Wait for a scheduler slot; returns ``(primary, ticket)``.
+
+        The fastest endpoint is preferred, but while its budget is throttled
+        (429, token window full) the ticket goes to the next-ranked endpoint
+        with room, so one rate-limited provider does not stall every session.
+        """
+        ranked = self.ranked()
+        if self.scheduler is None:
+            return ranked[0], None
+        ticket = self.scheduler.acquire(session_id, priority, tokens, budget=ranked[0].name,
+                                        fallbacks=[e.name for e in ranked[1:]])
+        return next(e for e in ranked if e.name == ticket.budget), ticket
+
+    def release(self, ticket):
+        """Return a ticket from ``admit`` that was never passed to ``post``."""
+        if ticket is not None:
+            self.scheduler.release(ticket)
+
+    def _settle(self, endpoint, ticket, future):
+        # Runs when a request returns, whether it won, lost or failed.
+        with self._lock:
+            self._in_flight -= 1
+        if ticket is None:
+            return
+        used = None
+        if not future.cancelled() and future.exception() is None:
+            response = future.result()
+            self.scheduler.update_from_headers(response.headers, response.status_code, budget=endpoint.name)
+            if response.ok:
+                try:
+                    used = response.json().get("usage", {}).get("total_tokens")
+                except ValueError:
+                    pass
+        self.scheduler.release(ticket, used)
+
+    def _submit(self, endpoint, ticket, payload, api_key, timeout, cancelled):
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(self._send, endpoint, payload, api_key, timeout, cancelled)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+            self.release(ticket)
+            raise
+        future.add_done_callback(lambda f: self._settle(endpoint, ticket, f))
+        return future
+
+    def _hedge_slot(self, hedge, ticket):
+        """``(allowed, ticket)`` for a hedge; not allowed without spare capacity."""
+        if self.scheduler is None:
+            with self._lock:
+                return self._in_flight < self.max_workers, None
+        if ticket is None:
+            return False, None
+        hedge_ticket = self.scheduler.try_acquire(ticket.session_id, ticket.priority, ticket.tokens,
+                                                  budget=hedge.name)
+        return hedge_ticket is not None, hedge_ticket
+
+    # ----------------------------------
+    # Requests
+    # ----------------------------------
+    def _send(self, endpoint, payload, api_key, timeout, cancelled):
+        body = dict(payload, model=endpoint.model) if endpoint.model else payload
+        headers = {
+            "Authorization": f"Bearer {endpoint.key_for(api_key)}",
+            "Content-Type": "application/json"
+        }
+        started = time.monotonic()
+        try:
+            response = self.http.post(endpoint.url, headers=headers, json=body, timeout=timeout)
+        except requests.RequestException:
+            endpoint.latency.observe(time.monotonic() - started, error=True)
+            raise
+        failed = response.status_code == 429 or response.status_code >= 500
+        endpoint.latency.observe(time.monotonic() - started, error=failed)
+        if cancelled.is_set():
+            response.close()
+        return response
+
+    def post(self, payload, api_key, timeout, primary=None, ticket=None):
+        """Send ``payload`` with hedging; returns ``(response, endpoint)``.
+
+        ``primary`` / ``ticket`` come from ``admit``; the router owns the
+        ticket from here on and releases it when the request returns.
+        """
+        ranked = self.ranked()
+        if primary is None:
+            primary = ranked[0]
+        cancelled = threading.Event()
+        futures = {self._submit(primary, ticket, payload, api_key, timeout, cancelled): primary}
+
+        done, _ = wait(futures, timeout=self.hedge_delay(primary))
+        # Hedge when the primary is slow; fail over at once when it already failed.
+        others = [e for e in ranked if e is not primary]
+        if others and not (done and _succeeded(next(iter(done)))):
+            hedge = others[0]
+            allowed, hedge_ticket = self._hedge_slot(hedge, ticket)
+            if not allowed:
+                with self._lock:
+                    self.hedges_skipped += 1
+            else:
+                futures[self._submit(hedge, hedge_ticket, payload, api_key, timeout, cancelled)] = hedge
+                with self._lock:
+                    self.hedges_sent += 1
+
+        pending = set(futures)
+        fallback = None  # last non-winning outcome, surfaced if nothing succeeds
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except requests.RequestException as e:
+                    fallback = fallback or e
+                    continue
+                if response.status_code == 429 or response.status_code >= 500:
+                    fallback = response
+                    continue
+                cancelled.set()
+                if futures[future] is not primary:
+                    with self._lock:
+                        self.hedges_won += 1
+                return response, futures[future]
+
+        if isinstance(fallback, requests.Response):
+            return fallback, primary
+        raise fallback
+
+    def metrics(self):
+        out = {"hedges_sent": self.hedges_sent, "hedges_won": self.hedges_won,
+               "hedges_skipped": self.hedges_skipped, "in_flight": self._in_flight}
+        for endpoint in self.endpoints:
+            hist = endpoint.latency
+            out[endpoint.name] = {"calls": hist.count, "error_rate": round(hist.error_rate(), 3)}
+            for p in (0.5, 0.95, 0.99):
+                value = hist.percentile(p)
+                out[endpoint.name][f"p{int(p * 100)}_s"] = round(value, 3) if value is not None else None
+        return out
+
+
+def _succeeded(future):
+    if future.exception() is not None:
+        return False
+    response = future.result()
+    return not (response.status_code == 429 or response.status_code >= 500)
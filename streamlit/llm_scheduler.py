@@ -0,0 +1,351 @@
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+from llm_providers import setting
+
+# ----------------------------------
+# Priority classes
+# ----------------------------------
+# Lower value = served first. A single interactive analysis from the Job Seekers
+# page always goes ahead of queued recruiter screening calls.
+INTERACTIVE = 0
+BULK = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Groq free-tier defaults for endpoints without configured limits (see
+# Endpoint / LLM_ENDPOINTS). Token limits are then replaced by the provider's
+# x-ratelimit-limit-tokens header; x-ratelimit-limit-requests is per day on
+# Groq, so the request limit only comes from configuration.
+DEFAULT_REQUESTS_PER_MINUTE = 30
+DEFAULT_TOKENS_PER_MINUTE = 6000
+DEFAULT_MAX_CONCURRENCY = 4
+
+WINDOW_SECONDS = 60.0
+
+
+def estimate_tokens(text, completion_tokens=512):
+    """Rough token estimate for budgeting (≈4 characters per token)."""
+    return len(text or "") // 4 + completion_tokens
+
+
+def _parse_reset(value):
+    """Parse provider reset durations such as '7.66s', '2m59.56s' or '120ms'."""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    total = 0.0
+    for amount, unit in re.findall(r"([\d.]+)(ms|h|m|s)", value):
+        amount = float(amount)
+        total += {"ms": amount / 1000, "s": amount, "m": amount * 60, "h": amount * 3600}[unit]
+    return total or None
+
+
+class _Ticket:
+    __slots__ = ("seq", "session_id", "priority", "tokens", "budgets", "budget", "enqueued_at", "granted_at")
+
+    def __init__(self, seq, session_id, priority, tokens, budgets=(None,)):
+        self.seq = seq
+        self.session_id = session_id
+        self.priority = priority
+        self.tokens = tokens
+        self.budgets = tuple(budgets)   # acceptable endpoints, in preference order
+        self.budget = self.budgets[0]   # the one actually granted
+        self.enqueued_at = time.monotonic()
+        self.granted_at = None
+
+
+class _Budget:
+    """Sliding one-minute request/token window of one endpoint."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.window = deque()  # (timestamp, tokens) of dispatched calls
+        self.blocked_until = 0.0
+        self.rate_limited = 0
+
+    def trim(self, now):
+        while self.window and now - self.window[0][0] >= WINDOW_SECONDS:
+            self.window.popleft()
+
+
+class LLMScheduler:
+    """Process-wide gate in front of every LLM call.
+
+    Every Streamlit session runs its script in its own thread, so callers simply
+    block in ``acquire`` until it is their turn. Dispatch order is:
+
+    1. strict priority (``INTERACTIVE`` before ``BULK``),
+    2. round-robin across sessions inside a priority class, FIFO per session,
+    3. gated by a sliding one-minute request/token budget and a concurrency cap.
+
+    Each endpoint (``budget`` key, None for the default one) has its own
+    budget, following that endpoint's rate-limit headers; the concurrency cap
+    is shared. A ticket may name ``fallbacks`` and is granted on the first of
+    its endpoints with room. Order is only enforced per endpoint: a ticket
+    waiting on a throttled endpoint does not hold back tickets for another.
+    """
+
+    def __init__(self, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=DEFAULT_TOKENS_PER_MINUTE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_concurrency = max_concurrency
+
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        # priority -> OrderedDict(session_id -> deque[_Ticket]); order = round-robin turn
+        self._queues = {p: OrderedDict() for p in PRIORITY_NAMES}
+        self._budgets = {}  # endpoint name (None = default) -> _Budget
+        self._in_flight = 0
+
+        # metrics
+        self._wait_times = {p: deque(maxlen=500) for p in PRIORITY_NAMES}
+        self._dispatched = {p: 0 for p in PRIORITY_NAMES}
+        self._hedges = 0
+
+    # ----------------------------------
+    # Queueing
+    # ----------------------------------
+    def _next_dispatch(self, now):
+        """``(ticket, budget, wait)``: who may go now, else how long until anyone might.
+
+        Tickets are walked in dispatch order. The first ticket that finds an
+        endpoint without room marks that endpoint unavailable for everyone
+        behind it, so order is kept per endpoint while other endpoints flow.
+        """
+        if self._in_flight >= self.max_concurrency:
+            return None, None, None  # wait for a release
+        unavailable = set()
+        wait = None
+        for priority in sorted(self._queues):
+            for pending in self._queues[priority].values():
+                for ticket in pending:
+                    for key in ticket.budgets:
+                        if key in unavailable:
+                            continue
+                        delay = self._seconds_until_budget(ticket.tokens, now, key)
+                        if delay == 0:
+                            return ticket, key, 0
+                        unavailable.add(key)
+                        wait = delay if wait is None else min(wait, delay)
+        return None, None, wait
+
+    def _pop(self, ticket):
+        sessions = self._queues[ticket.priority]
+        pending = sessions.pop(ticket.session_id)
+        pending.remove(ticket)
+        if pending:
+            # Session goes to the back of the round-robin order.
+            sessions[ticket.session_id] = pending
+
+    def _remove(self, ticket):
+        sessions = self._queues[ticket.priority]
+        pending = sessions.get(ticket.session_id)
+        if pending is None:
+            return
+        try:
+            pending.remove(ticket)
+        except ValueError:
+            return
+        if not pending:
+            del sessions[ticket.session_id]
+
+    # ----------------------------------
+    # Budget
+    # ----------------------------------
+    def _budget(self, key):
+        budget = self._budgets.get(key)
+        if budget is None:
+            budget = self._budgets[key] = _Budget(self.requests_per_minute, self.tokens_per_minute)
+        return budget
+
+    def configure_budget(self, key, requests_per_minute=None, tokens_per_minute=None):
+        """Set an endpoint's limits; None keeps the current value."""
+        with self._cond:
+            budget = self._budget(key)
+            if requests_per_minute:
+                budget.requests_per_minute = requests_per_minute
+            if tokens_per_minute:
+                budget.tokens_per_minute = tokens_per_minute
+            self._cond.notify_all()
+
+    def _seconds_until_budget(self, tokens, now, key=None):
+        """0 if ``tokens`` fit endpoint ``key``'s budget now, otherwise how long to wait."""
+        budget = self._budget(key)
+        if now < budget.blocked_until:
+            return budget.blocked_until - now
+        budget.trim(now)
+        used_requests = len(budget.window)
+        used_tokens = sum(t for _, t in budget.window)
+        # An oversized single request is allowed once the window is empty.
+        fits_tokens = used_tokens + tokens <= budget.tokens_per_minute or not budget.window
+        if used_requests < budget.requests_per_minute and fits_tokens:
+            return 0
+        return max(0.01, WINDOW_SECONDS - (now - budget.window[0][0]))
+
+    def _grant(self, ticket, now):
+        ticket.granted_at = now
+        self._budget(ticket.budget).window.append((now, ticket.tokens))
+        self._in_flight += 1
+
+    # ----------------------------------
+    # Public API
+    # ----------------------------------
+    def acquire(self, session_id, priority=BULK, tokens=0, timeout=None, budget=None, fallbacks=()):
+        """Block until the caller may issue one LLM request. Returns a ticket.
+
+        The ticket is granted on ``budget`` or, while that endpoint has no
+        room, on the first of ``fallbacks`` that does; ``ticket.budget`` says
+        which.
+        """
+        ticket = _Ticket(next(self._seq), session_id, priority, tokens, (budget, *fallbacks))
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._queues[priority].setdefault(session_id, deque()).append(ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    chosen, key, wait = self._next_dispatch(now)
+                    if chosen is ticket:
+                        break
+                    # Another ticket goes first; its grant notifies us again.
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise TimeoutError("Timed out waiting for an LLM request slot.")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                self._remove(ticket)
+                self._cond.notify_all()
+                raise
+
+            self._pop(ticket)
+            ticket.budget = key
+            self._grant(ticket, now)
+            self._dispatched[priority] += 1
+            self._wait_times[priority].append(now - ticket.enqueued_at)
+            self._cond.notify_all()
+        return ticket
+
+    def try_acquire(self, session_id, priority=BULK, tokens=0, budget=None):
+        """Ticket for an extra (hedged) request if one fits right now, else None.
+
+        Never waits and never overtakes queued work of the same or a higher
+        priority: hedges only use capacity nobody else is asking for.
+        """
+        with self._cond:
+            if any(self._queues[p] for p in PRIORITY_NAMES if p <= priority):
+                return None
+            if self._in_flight >= self.max_concurrency:
+                return None
+            now = time.monotonic()
+            if self._seconds_until_budget(tokens, now, budget) != 0:
+                return None
+            ticket = _Ticket(next(self._seq), session_id, priority, tokens, (budget,))
+            self._grant(ticket, now)
+            self._hedges += 1
+            return ticket
+
+    def release(self, ticket, tokens_used=None):
+        """Return the slot; optionally correct the token estimate with real usage."""
+        with self._cond:
+            self._in_flight -= 1
+            if tokens_used is not None:
+                window = self._budget(ticket.budget).window
+                for i, (ts, tokens) in enumerate(window):
+                    if ts == ticket.granted_at and tokens == ticket.tokens:
+                        window[i] = (ts, tokens_used)
+                        break
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, session_id, priority=BULK, tokens=0, timeout=None, budget=None, fallbacks=()):
+        ticket = self.acquire(session_id, priority, tokens, timeout, budget, fallbacks)
+        try:
+            yield ticket
+        finally:
+            self.release(ticket)
+
+    def update_from_headers(self, headers, status_code=None, budget=None):
+        """Follow an endpoint's advertised limits and back off on its 429s."""
+        if headers is None:
+            return
+        with self._cond:
+            state = self._budget(budget)
+            limit_tokens = headers.get("x-ratelimit-limit-tokens")
+            if limit_tokens and limit_tokens.isdigit():
+                state.tokens_per_minute = int(limit_tokens)
+
+            now = time.monotonic()
+            remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+            if remaining_tokens is not None and remaining_tokens.isdigit() and int(remaining_tokens) == 0:
+                reset = _parse_reset(headers.get("x-ratelimit-reset-tokens"))
+                if reset:
+                    state.blocked_until = max(state.blocked_until, now + reset)
+
+            if status_code == 429:
+                state.rate_limited += 1
+                retry_after = _parse_reset(headers.get("retry-after")) or 1.0
+                state.blocked_until = max(state.blocked_until, now + retry_after)
+            self._cond.notify_all()
+
+    def metrics(self):
+        """Snapshot of queue depth, wait times and per-endpoint budget usage."""
+        with self._cond:
+            now = time.monotonic()
+            out = {"in_flight": self._in_flight, "max_concurrency": self.max_concurrency,
+                   "hedges_admitted": self._hedges}
+            for priority, name in PRIORITY_NAMES.items():
+                waits = sorted(self._wait_times[priority])
+                sessions = self._queues[priority]
+                out[f"{name}_queue_depth"] = sum(len(q) for q in sessions.values())
+                out[f"{name}_waiting_sessions"] = len(sessions)
+                out[f"{name}_dispatched"] = self._dispatched[priority]
+                out[f"{name}_wait_p50_s"] = round(waits[len(waits) // 2], 3) if waits else 0.0
+                out[f"{name}_wait_p95_s"] = round(waits[int(len(waits) * 0.95)], 3) if waits else 0.0
+            budgets = {}
+            for key, budget in self._budgets.items():
+                budget.trim(now)
+                budgets[key or "default"] = {
+                    "requests_last_minute": len(budget.window),
+                    "tokens_last_minute": sum(t for _, t in budget.window),
+                    "requests_per_minute": budget.requests_per_minute,
+                    "tokens_per_minute": budget.tokens_per_minute,
+                    "rate_limited": budget.rate_limited,
+                    "blocked_for_s": round(max(0.0, budget.blocked_until - now), 2),
+                }
+            out["budgets"] = budgets
+            return out
+
+
+# ----------------------------------
+# Process-wide instance
+# ----------------------------------
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """The single scheduler shared by every session in this Streamlit process.
+
+    The concurrency cap comes from LLM_MAX_CONCURRENCY (st.secrets or
+    $ECHOSAGE_LLM_MAX_CONCURRENCY); per-endpoint limits are set by the router.
+    """
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = LLMScheduler(
+                    max_concurrency=int(setting("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)))
+    return _scheduler
@@ -4,11 +4,19 @@ import json
 import requests
 import re
 import time
+from collections import deque
+import pandas as pd
 from docx import Document
 from PyPDF2 import PdfReader
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from io import BytesIO
+from ats import generate_ats_scorecard, local_screening_result
+from circuit_breaker import RetryBackoff, get_breaker
+from dedup import cluster_near_duplicates
+from export import FORMATS, ResultExporter, export_results, load_results, parquet_available
+from llm_client import BULK, chat_completion, get_router, provider_unavailable
+from llm_scheduler import get_scheduler
+from reports import candidate_report, candidates_report, candidates_zip
+from results_index import ResultIndex
+from speculative import Speculator
 
 # ----------------------------------
 # Config & constants
@@ -18,13 +26,8 @@ st.set_page_config(page_title="📄 Resume Analyzer Pro", layout="wide")
 # 🔐 GROQ API Config
 # Prefer: st.secrets["GROQ_API_KEY"]
 GROQ_API_KEY = st.secrets.get("GROQ_API_KEY", "PUT_YOUR_KEY_IN_st.secrets_PLEASE")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 GROQ_MODEL = "llama3-8b-8192"
-
-HEADERS = {
-    "Authorization": f"Bearer {GROQ_API_KEY}",
-    "Content-Type": "application/json"
-}
+PAGE_SIZES = [10, 25, 50, 100]
 
 # ----------------------------------
 # Sidebar (procedure + sorting help + features)
@@ -35,7 +38,8 @@ st.sidebar.markdown("""
 1. Paste a **Job Description (JD)**.
 2. Upload one or more **resumes** (`.pdf`/`.docx`).
 3. Click **Analyze**.
-4. Use the **Sort Order** switch to reorder the results.
+4. Use the **Sort Order** switch, score range and skill filters to browse the results table.
+5. Pick a candidate under **Candidate details** for the full breakdown and PDF.
 
 **Sorting**
 - **Ascending** = *Least to Best* (lowest score first)
@@ -45,7 +49,10 @@ st.sidebar.markdown("""
 - AI-based JD ↔ Resume matching
 - Score (0–100), matched & missing skills
 - One-line reason for the score
-- Downloadable **PDF report** per resume
+- Near-duplicate resumes are detected and analyzed only once
+- If the AI provider is down, resumes are scored locally (marked degraded) and re-analyzed once it recovers
+- Downloadable **PDF report** per resume, or all of them as one PDF / ZIP
+- Bulk export of all results (CSV / JSONL / Parquet)
 """)
 
 sort_order = st.sidebar.radio(
@@ -54,6 +61,14 @@ sort_order = st.sidebar.radio(
     index=0
 )
 
+with st.sidebar.expander("📈 LLM queue"):
+    # Shared by every open session in this process (see llm_scheduler.py).
+    st.json(get_scheduler().metrics())
+    st.caption("Circuit breaker")
+    st.json(get_breaker().metrics())
+    st.caption("Endpoints")
+    st.json(get_router().metrics())
+
 # ----------------------------------
 # Helpers
 # ----------------------------------
@@ -65,6 +80,11 @@ def extract_text_from_pdf(file):
     reader = PdfReader(file)
     return "\n".join(page.extract_text() or "" for page in reader.pages)
 
+def extract_resume_text(file):
+    if file.name.endswith('.docx'):
+        return extract_text_from_docx(file)
+    return extract_text_from_pdf(file)
+
 def extract_json(content: str):
     """Try to coerce any 'extra-text + JSON' response into a clean JSON."""
     try:
@@ -103,66 +123,80 @@ IMPORTANT: Return ONLY the JSON object, without any additional text or explanati
     }
 
     try:
-        response = requests.post(GROQ_API_URL, headers=HEADERS, json=data, timeout=60)
+        # Bulk screening: queued fairly behind interactive Job Seekers requests.
+        response = chat_completion(data, GROQ_API_KEY, priority=BULK)
         response.raise_for_status()
         result = response.json()
         content = result["choices"][0]["message"]["content"]
         return extract_json(content)
     except requests.exceptions.HTTPError as e:
         # 429 / 400 etc.
-        return {"error": f"HTTPError: {e}", "raw_response": response.text if 'response' in locals() else None}
+        return {"error": f"HTTPError: {e}", "raw_response": response.text if 'response' in locals() else None,
+                "unavailable": provider_unavailable(e)}
     except Exception as e:
-        return {"error": str(e)}
-
-def generate_pdf_report(file_name, score, matched_skills, missing_skills, reason):
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    y = height - 50
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, y, f"Resume Analysis Report — {file_name}")
-    y -= 40
-
-    c.setFont("Helvetica", 12)
-    c.drawString(50, y, f"Score: {score}%")
-    y -= 25
-
-    c.drawString(50, y, "Matched Skills:")
-    y -= 20
-    for skill in matched_skills:
-        c.drawString(70, y, f"• {skill}")
-        y -= 15
-        if y < 100:
-            c.showPage()
-            y = height - 50
-            c.setFont("Helvetica", 12)
-
-    y -= 10
-    c.drawString(50, y, "Missing Skills:")
-    y -= 20
-    for skill in missing_skills:
-        c.drawString(70, y, f"• {skill}")
-        y -= 15
-        if y < 100:
-            c.showPage()
-            y = height - 50
-            c.setFont("Helvetica", 12)
-
-    y -= 10
-    c.drawString(50, y, "Reason:")
-    y -= 20
-    for line in reason.split('. '):
-        c.drawString(70, y, line.strip())
-        y -= 15
-        if y < 100:
-            c.showPage()
-            y = height - 50
-            c.setFont("Helvetica", 12)
-
-    c.save()
-    buffer.seek(0)
-    return buffer
+        return {"error": str(e), "unavailable": provider_unavailable(e)}
+
+def normalize_analysis(analysis):
+    # Ensure minimal fields exist to avoid KeyErrors
+    analysis.setdefault("score", 0)
+    analysis.setdefault("matched_skills", [])
+    analysis.setdefault("missing_skills", [])
+    analysis.setdefault("reason", "No reason provided.")
+    return analysis
+
+def requeue_members(pending_clusters, cluster, texts):
+    """Put the rest of a cluster back in front of the queue when its representative failed.
+
+    The members are re-clustered among themselves, so each one either gets its
+    own analysis or reuses a new representative it is similar enough to.
+    """
+    members = [idx for idx, _ in cluster[1:]]
+    if not members:
+        return
+    subclusters = cluster_near_duplicates([texts[idx] for idx in members])
+    for sub in reversed(subclusters):
+        pending_clusters.appendleft([(members[i], similarity) for i, similarity in sub])
+
+def retriable_degraded(results, prepared_by_name, gave_up):
+    """Names of degraded representatives that can still be sent to the LLM."""
+    return [name for name, data in results
+            if data.get("degraded") and not data.get("duplicate_of")
+            and name in prepared_by_name and name not in gave_up]
+
+def reanalyze_degraded(results, job_description, prepared_by_name, gave_up):
+    """Re-run the LLM for degraded results once the provider lets calls through.
+
+    Candidates that fail with a non-transient error (e.g. unparseable JSON)
+    are added to ``gave_up`` and not retried. Returns ``(updated, reachable)``:
+    the updated results list (None if nothing was refreshed) and whether the
+    provider answered every call.
+    """
+    fresh = {}
+    reachable = True
+    for name in retriable_degraded(results, prepared_by_name, gave_up):
+        analysis = get_resume_analysis(job_description, prepared_by_name[name].text)
+        if analysis.get("unavailable"):
+            reachable = False
+            break  # still down; keep the rest degraded
+        if "error" in analysis:
+            gave_up.add(name)
+            continue
+        analysis = normalize_analysis(analysis)
+        speculator.remember(prepared_by_name[name], dict(analysis))
+        fresh[name] = analysis
+    if not fresh:
+        return None, reachable
+
+    updated = []
+    for name, data in results:
+        source = data.get("duplicate_of") or name
+        if data.get("degraded") and source in fresh:
+            refreshed = dict(fresh[source], ats=data.get("ats"), timings=data.get("timings"))
+            if source != name:
+                refreshed.update(duplicate_of=source, similarity=data.get("similarity", 1.0))
+            data = refreshed
+        updated.append((name, data))
+    return updated, reachable
 
 # ----------------------------------
 # Main UI
@@ -176,6 +210,33 @@ uploaded_files = st.file_uploader("📁 Upload Resumes (PDF or DOCX)", type=["pd
 # Maintain results between reruns (so you can re-sort without paying API again)
 if "results" not in st.session_state:
     st.session_state.results = None
+if "exporter" not in st.session_state:
+    st.session_state.exporter = None
+if "reanalysis_failed" not in st.session_state:
+    st.session_state.reanalysis_failed = set()
+if "recruiter_speculator" not in st.session_state:
+    st.session_state.recruiter_speculator = Speculator(extract_resume_text, "recruiter", GROQ_MODEL)
+
+# Extract, hash, ATS-score and look up cached analyses in the background as soon
+# as resumes/JD are on the page; stale work is cancelled when inputs change.
+speculator = st.session_state.recruiter_speculator
+speculator.update(uploaded_files, job_description)
+
+# Restore a previous session from a bulk export instead of calling the LLM again
+with st.sidebar.expander("♻️ Restore from export"):
+    restore_file = st.file_uploader("CSV, JSONL or Parquet export", type=["csv", "jsonl", "parquet"], key="restore_file")
+    if restore_file is not None and st.session_state.get("restored_from") != restore_file.file_id:
+        try:
+            restored = load_results(restore_file)
+            st.session_state.results = restored
+            st.session_state.exporter = export_results(restored)
+            st.session_state.batch_reports = None
+            st.session_state.prepared_by_name = {}
+            st.session_state.recruiter_retry_backoff = None
+            st.session_state.restored_from = restore_file.file_id
+            st.success(f"Restored {len(restored)} result(s) from {restore_file.name}.")
+        except Exception as e:
+            st.error(f"Could not restore {restore_file.name}: {e}")
 
 if st.button("🔍 Analyze"):
     if not job_description:
@@ -186,64 +247,220 @@ if st.button("🔍 Analyze"):
         results = []
         st.subheader("📊 Analysis Results")
 
-        for idx, file in enumerate(uploaded_files):
+        # 1) Extract every resume first so near-duplicates can be grouped.
+        # Usually already done by the speculative pre-processing above.
+        names, texts, preps = [], [], []
+        for file in uploaded_files:
             try:
-                if file.name.endswith('.docx'):
-                    file_text = extract_text_from_docx(file)
-                else:
-                    file_text = extract_text_from_pdf(file)
-
-                if not file_text.strip():
+                prepared = speculator.prepare(file, job_description)
+                if not prepared.text.strip():
                     st.error(f"❌ {file.name}: Empty or unreadable content.")
                     continue
 
-                with st.spinner(f"Analyzing {file.name}..."):
-                    analysis = get_resume_analysis(job_description, file_text)
+                names.append(file.name)
+                texts.append(prepared.text)
+                preps.append(prepared)
+            except Exception as e:
+                st.error(f"❌ Failed to process {file.name}: {e}")
 
-                if "error" in analysis:
-                    st.error(f"❌ Error processing {file.name}: {analysis['error']}")
+        # 2) Analyze one representative per near-duplicate cluster, reuse it for the rest.
+        clusters = cluster_near_duplicates(texts)
+        skipped = len(texts) - len(clusters)
+        if skipped:
+            st.info(f"🔁 Found {skipped} near-duplicate resume(s); they reuse their representative's analysis.")
+
+        # Results are streamed into the bulk export as they arrive.
+        exporter = ResultExporter()
+
+        def add_result(idx, analysis, analysis_seconds):
+            analysis["ats"] = preps[idx].ats or generate_ats_scorecard(texts[idx], job_description)
+            analysis["timings"] = {
+                "extract_seconds": preps[idx].extract_seconds,
+                "analysis_seconds": analysis_seconds,
+            }
+            results.append((names[idx], analysis))
+            exporter.add(names[idx], analysis)
+
+        pending_clusters = deque(clusters)
+        while pending_clusters:
+            cluster = pending_clusters.popleft()
+            rep_idx = cluster[0][0]
+            rep_name = names[rep_idx]
+            try:
+                started = time.perf_counter()
+                if preps[rep_idx].cached is not None:
+                    analysis = dict(preps[rep_idx].cached)
+                else:
+                    with st.spinner(f"Analyzing {rep_name}..."):
+                        analysis = get_resume_analysis(job_description, texts[rep_idx])
+                    if "error" not in analysis:
+                        speculator.remember(preps[rep_idx], dict(normalize_analysis(analysis)))
+                analysis_seconds = time.perf_counter() - started
+
+                if analysis.get("unavailable"):
+                    # Provider down or breaker open: fail fast to the local ATS result.
+                    analysis = local_screening_result(texts[rep_idx], job_description, preps[rep_idx].ats)
+                elif "error" in analysis:
+                    st.error(f"❌ Error processing {rep_name}: {analysis['error']}")
                     if "raw_response" in analysis and analysis["raw_response"]:
-                        with st.expander(f"Raw response from API for {file.name}"):
+                        with st.expander(f"Raw response from API for {rep_name}"):
                             st.code(analysis["raw_response"])
-                else:
-                    # Ensure minimal fields exist to avoid KeyErrors
-                    analysis.setdefault("score", 0)
-                    analysis.setdefault("matched_skills", [])
-                    analysis.setdefault("missing_skills", [])
-                    analysis.setdefault("reason", "No reason provided.")
-                    results.append((file.name, analysis))
+                    requeue_members(pending_clusters, cluster, texts)
+                    continue
+
+                add_result(rep_idx, normalize_analysis(analysis), analysis_seconds)
 
-                # Simple throttle to avoid 429s (tune as needed)
-                time.sleep(1.1)
+                for idx, similarity in cluster[1:]:
+                    duplicate = dict(analysis, duplicate_of=rep_name, similarity=similarity)
+                    add_result(idx, duplicate, 0.0)
 
             except Exception as e:
-                st.error(f"❌ Failed to process {file.name}: {e}")
+                st.error(f"❌ Failed to process {rep_name}: {e}")
+                if not any(name == rep_name for name, _ in results):
+                    requeue_members(pending_clusters, cluster, texts)
+
+        degraded = sum(1 for _, data in results if data.get("degraded"))
+        if degraded:
+            st.warning(f"⚠️ AI provider unavailable: {degraded} candidate(s) were scored locally (marked as degraded). "
+                       "They are re-analyzed automatically once the provider recovers.")
 
         # Save to session state for re-sorting later
+        exporter.close()
+        st.session_state.recruiter_retry_backoff = RetryBackoff() if degraded else None
+        st.session_state.reanalysis_failed = set()
+        st.session_state.prepared_by_name = {prep.name: prep for prep in preps}
+        st.session_state.recruiter_analysis_jd = job_description
         st.session_state.results = results
+        st.session_state.exporter = exporter
+        st.session_state.batch_reports = None
+
+# ----------------------------------
+# Recover degraded results once the provider is healthy again
+# ----------------------------------
+backoff = st.session_state.get("recruiter_retry_backoff")
+if (st.session_state.results and backoff is not None and backoff.ready()
+        and retriable_degraded(st.session_state.results, st.session_state.get("prepared_by_name", {}),
+                               st.session_state.reanalysis_failed)):
+    with st.spinner("AI provider is reachable again — re-analyzing degraded candidates..."):
+        refreshed, reachable = reanalyze_degraded(
+            st.session_state.results, st.session_state.get("recruiter_analysis_jd", ""),
+            st.session_state.get("prepared_by_name", {}), st.session_state.reanalysis_failed)
+    backoff.attempted(reachable)
+    if refreshed is not None:
+        st.session_state.results = refreshed
+        st.session_state.exporter = export_results(refreshed)
+        st.session_state.batch_reports = None
+        st.success("♻️ AI provider recovered — degraded candidates were re-analyzed.")
 
 # ----------------------------------
 # Show results (if we have any), sorted by chosen order
 # ----------------------------------
 if st.session_state.results:
     results = st.session_state.results
-
-    reverse_sort = (sort_order.startswith("Descending"))
-    results_sorted = sorted(results, key=lambda x: x[1]["score"], reverse=reverse_sort)
+    descending = sort_order.startswith("Descending")
+
+    # Ranking is computed once per result set, not on every rerun.
+    if st.session_state.get("result_index") is None or st.session_state.result_index_source is not results:
+        st.session_state.result_index = ResultIndex(results)
+        st.session_state.result_index_source = results
+    index = st.session_state.result_index
+
+    # Bulk export of the whole result set; the chosen format is read from the
+    # exporter's temp file on demand and kept until the results change, so
+    # reruns don't reload and resend every format.
+    exporter = st.session_state.exporter
+    if exporter is not None:
+        st.subheader("📦 Export All Results")
+        formats = ["csv", "jsonl"] + (["parquet"] if parquet_available() else [])
+        export_cols = st.columns([2, 1, 2])
+        with export_cols[0]:
+            fmt = st.selectbox("Format", formats, format_func=str.upper, key="export_format",
+                               label_visibility="collapsed")
+        with export_cols[1]:
+            if st.button(f"📦 Prepare ({exporter.count} rows)", key="prepare_export"):
+                st.session_state.export_download = (exporter, fmt, exporter.getvalue(fmt))
+        download = st.session_state.get("export_download")
+        if download is not None and download[0] is exporter:
+            _, ready_fmt, data = download
+            mime, ext = FORMATS[ready_fmt]
+            with export_cols[2]:
+                st.download_button(
+                    label=f"⬇️ {ready_fmt.upper()} ({exporter.count} rows)",
+                    data=data,
+                    file_name=f"screening_results.{ext}",
+                    mime=mime,
+                    key="export_download_button"
+                )
+
+    # All candidate reports at once; rendered on demand, then kept until results change
+    if st.button("🗂️ Prepare all PDF reports"):
+        with st.spinner("Rendering reports..."):
+            ordered = index.ordered(descending)
+            st.session_state.batch_reports = (candidates_report(ordered), candidates_zip(ordered))
+    if st.session_state.get("batch_reports"):
+        combined_pdf, reports_zip = st.session_state.batch_reports
+        report_cols = st.columns(2)
+        with report_cols[0]:
+            st.download_button("📚 All reports (one PDF)", data=combined_pdf,
+                               file_name="Recruiter_Reports.pdf", mime="application/pdf", key="download_all_pdf")
+        with report_cols[1]:
+            st.download_button("🗜️ All reports (ZIP)", data=reports_zip,
+                               file_name="Recruiter_Reports.zip", mime="application/zip", key="download_all_zip")
 
     st.subheader("📊 Ranked Resumes")
-    for rank, (name, data) in enumerate(results_sorted, 1):
+
+    # Filters + pagination (all answered from the precomputed index)
+    f1, f2, f3 = st.columns([2, 3, 1])
+    with f1:
+        min_score, max_score = st.slider("Score range", 0, 100, (0, 100), key="filter_score")
+    with f2:
+        required_skills = st.multiselect("Required skills (matched)", index.skills, key="filter_skills")
+    with f3:
+        page_size = st.selectbox("Per page", PAGE_SIZES, index=1, key="page_size")
+
+    _, total = index.page(1, 1, min_score, max_score, required_skills, descending)
+    page_count = max(1, -(-total // page_size))
+    # Filters can shrink the page count below the page we were on.
+    if st.session_state.get("page", 1) > page_count:
+        st.session_state.page = page_count
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, step=1, key="page")
+    rows, total = index.page(page, page_size, min_score, max_score, required_skills, descending)
+    st.caption(f"{total} of {len(index)} candidate(s) match the filters.")
+
+    if rows:
+        table = pd.DataFrame([{
+            "Rank": rank,
+            "Resume": name,
+            "Score": data["score"],
+            "ATS": (data.get("ats") or {}).get("overall_score"),
+            "Matched Skills": ", ".join(map(str, data["matched_skills"])),
+            "Missing Skills": ", ".join(map(str, data["missing_skills"])),
+            "Duplicate Of": data.get("duplicate_of") or "",
+            "Degraded": "⚠️" if data.get("degraded") else "",
+        } for rank, name, data in rows])
+        st.dataframe(table, hide_index=True, use_container_width=True)
+
+        # Detail pane for one candidate on the current page
+        labels = [f"#{rank}. {name} — {data['score']}%" for rank, name, data in rows]
+        choice = st.selectbox("🔎 Candidate details", range(len(rows)), format_func=labels.__getitem__, key="detail")
+        rank, name, data = rows[choice]
         st.markdown(f"### #{rank}. **{name}** — Score: **{data['score']}%**")
+        if data.get("degraded"):
+            st.warning("⚠️ Degraded result: scored locally while the AI provider was unavailable.")
+        if data.get("duplicate_of"):
+            st.warning(f"🔁 Near-duplicate of **{data['duplicate_of']}** (~{data['similarity']:.0%} similar) — analysis reused.")
+        if data.get("ats"):
+            st.caption(f"ATS score: {data['ats']['overall_score']}/100")
         st.success(f"✅ **Matched Skills:** {', '.join(data['matched_skills']) or 'None'}")
         st.error(f"❌ **Missing Skills:** {', '.join(data['missing_skills']) or 'None'}")
         st.info(f"📌 **Reason:** {data['reason']}")
 
-        # PDF Report Download
-        pdf = generate_pdf_report(name, data['score'], data['matched_skills'], data['missing_skills'], data['reason'])
+        # PDF Report Download (only the selected candidate is rendered)
+        pdf = candidate_report(name, data)
         st.download_button(
             label="📥 Download Recruiter Report PDF",
             data=pdf,
             file_name=f"Report_{name}.pdf",
             mime="application/pdf",
-            key=f"download_{name}"
+            key="download_selected"
         )
@@ -0,0 +1,354 @@
+"""Shared PDF report rendering for the Job Seekers and Recruiters pages.
+
+Reports are described as a flat list of blocks (title, heading, paragraph,
+bullets, ...). One layout engine draws them with word wrapping and automatic
+pagination on a reportlab canvas. Fonts, styles and section regexes are set
+up once at import time, so a single report only pays for drawing.
+
+Benchmark:  python reports.py --bench 500
+"""
+import glob
+import os
+import re
+import time
+import unicodedata
+import zipfile
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+# ----------------------------------
+# Fonts
+# ----------------------------------
+# A Unicode TTF keeps names, bullets, dashes and non-Latin scripts intact.
+# Search order: $ECHOSAGE_REPORT_FONT, ./fonts, system DejaVu, matplotlib's copy.
+_FONT_DIRS = [
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts"),
+    "/usr/share/fonts/truetype/dejavu",
+    "/usr/share/fonts/dejavu",
+    "/Library/Fonts",
+    "C:\\Windows\\Fonts",
+]
+
+
+def _find_font_files():
+    regular = os.environ.get("ECHOSAGE_REPORT_FONT")
+    if regular and os.path.exists(regular):
+        bold = os.environ.get("ECHOSAGE_REPORT_FONT_BOLD", regular)
+        return regular, bold if os.path.exists(bold) else regular
+    dirs = list(_FONT_DIRS)
+    try:
+        import matplotlib
+        dirs.append(os.path.join(os.path.dirname(matplotlib.__file__), "mpl-data", "fonts", "ttf"))
+    except ImportError:
+        pass
+    for d in dirs:
+        regular = os.path.join(d, "DejaVuSans.ttf")
+        if os.path.exists(regular):
+            bold = os.path.join(d, "DejaVuSans-Bold.ttf")
+            return regular, bold if os.path.exists(bold) else regular
+    matches = glob.glob("/usr/share/fonts/**/DejaVuSans.ttf", recursive=True)
+    if matches:
+        return matches[0], matches[0].replace("DejaVuSans.ttf", "DejaVuSans-Bold.ttf")
+    return None, None
+
+
+def _register_fonts():
+    regular, bold = _find_font_files()
+    if regular:
+        try:
+            pdfmetrics.registerFont(TTFont("EchoSans", regular))
+            pdfmetrics.registerFont(TTFont("EchoSans-Bold", bold if os.path.exists(bold) else regular))
+            return "EchoSans", "EchoSans-Bold", True
+        except Exception:
+            pass
+    return "Helvetica", "Helvetica-Bold", False
+
+
+FONT, FONT_BOLD, UNICODE_FONT = _register_fonts()
+
+# Block styles: (font, size, leading, space before, space after, left indent)
+STYLES = {
+    "title": (FONT_BOLD, 16, 20, 0, 6, 0),
+    "subtitle": (FONT, 9, 12, 0, 14, 0),
+    "heading": (FONT_BOLD, 13, 17, 10, 4, 0),
+    "text": (FONT, 11, 14, 0, 4, 0),
+    "bullet": (FONT, 11, 14, 0, 1, 14),
+    "footer": (FONT, 8, 10, 0, 0, 0),
+}
+
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 50
+BOTTOM = 60
+TEXT_WIDTH = PAGE_WIDTH - 2 * MARGIN
+BULLET = "•" if UNICODE_FONT else "-"
+
+
+def _safe(text):
+    """Text the active font can draw (Latin-1 fallback only without a TTF)."""
+    text = "" if text is None else str(text)
+    if UNICODE_FONT:
+        return text
+    text = unicodedata.normalize("NFKD", text)
+    return text.encode("latin-1", "ignore").decode("latin-1")
+
+
+@lru_cache(maxsize=8192)
+def _wrap(paragraph, font, size, width):
+    # Skills, headings and boilerplate repeat across candidates; wrap them once.
+    return tuple(simpleSplit(paragraph, font, size, width) or [""])
+
+
+# ----------------------------------
+# Layout engine
+# ----------------------------------
+class _Layout:
+    """Draws blocks onto a canvas, wrapping lines and breaking pages.
+
+    A ``("footer", label)`` block sets the label printed next to the page
+    number from the current page on (the candidate name in batch PDFs).
+    """
+
+    def __init__(self, c, footer=None):
+        self.c = c
+        self.footer = footer
+        self.page = 1
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def _finish_page(self):
+        font, size, *_ = STYLES["footer"]
+        self.c.setFont(font, size)
+        dash = "—" if UNICODE_FONT else "-"
+        label = f"Page {self.page}" + (f" {dash} {self.footer}" if self.footer else "")
+        self.c.drawCentredString(PAGE_WIDTH / 2, 30, _safe(label))
+
+    def new_page(self):
+        self._finish_page()
+        self.c.showPage()
+        self.page += 1
+        self.y = PAGE_HEIGHT - MARGIN
+
+    def draw(self, style, text, prefix=""):
+        font, size, leading, before, after, indent = STYLES[style]
+        self.y -= before
+        width = TEXT_WIDTH - indent
+        lines = []
+        for paragraph in _safe(text).splitlines() or [""]:
+            lines.extend(_wrap(paragraph, font, size, width - (12 if prefix else 0)))
+        self.c.setFont(font, size)
+        for i, line in enumerate(lines):
+            if self.y - leading < BOTTOM:
+                self.new_page()
+                self.c.setFont(font, size)
+            self.y -= leading
+            x = MARGIN + indent
+            if prefix:
+                if i == 0:
+                    self.c.drawString(x, self.y, prefix)
+                x += 12
+            if style in ("title", "subtitle"):
+                self.c.drawCentredString(PAGE_WIDTH / 2, self.y, line)
+            else:
+                self.c.drawString(x, self.y, line)
+        self.y -= after
+
+    def render(self, blocks):
+        for kind, value in blocks:
+            if kind == "bullets":
+                items = list(value) or ["None"]
+                for item in items:
+                    self.draw("bullet", item, prefix=BULLET)
+                self.y -= STYLES["text"][4]
+            elif kind == "page_break":
+                self.new_page()
+            elif kind == "footer":
+                self.footer = value
+            else:
+                self.draw(kind, value)
+
+    def close(self):
+        self._finish_page()
+        self.c.showPage()
+
+
+def _new_canvas(buffer, title):
+    # Page compression off: bigger files, but rendering is markedly cheaper.
+    c = canvas.Canvas(buffer, pagesize=A4, pageCompression=0)
+    c.setTitle(_safe(title))
+    return c
+
+
+def render_blocks(blocks, title="Resume Analysis Report"):
+    """Render one block list to PDF bytes."""
+    buffer = BytesIO()
+    c = _new_canvas(buffer, title)
+    layout = _Layout(c)
+    layout.render(blocks)
+    layout.close()
+    c.save()
+    return buffer.getvalue()
+
+
+# ----------------------------------
+# Job Seekers report
+# ----------------------------------
+FEEDBACK_SECTIONS = {
+    "Summary": "Resume Feedback Summary",
+    "Analysis": "Detailed Analysis",
+    "Missing": "Missing Skills or Keywords",
+    "Suggestions": "Suggestions to Improve",
+    "Additional": "Additional Recommendations",
+}
+_SECTION_RE = re.compile(
+    r"###\s*(" + "|".join(re.escape(h) for h in FEEDBACK_SECTIONS.values()) + r")(.*?)(?=###|\Z)",
+    re.DOTALL,
+)
+_HEADING_TO_KEY = {heading: key for key, heading in FEEDBACK_SECTIONS.items()}
+
+DEFAULT_RECOMMENDATIONS = [
+    "1. Add more keywords from the job description.",
+    "2. Quantify achievements with metrics.",
+    "3. Highlight relevant skills at the top.",
+    "4. Use standard section headings.",
+    "5. Avoid graphics and tables.",
+]
+
+
+def parse_feedback_sections(feedback, default="Not available"):
+    """Split the LLM feedback into its ### sections in a single regex pass."""
+    parsed = {key: default for key in FEEDBACK_SECTIONS}
+    for match in _SECTION_RE.finditer(feedback or ""):
+        key = _HEADING_TO_KEY[match.group(1)]
+        if parsed[key] == default:
+            parsed[key] = match.group(2).strip() or default
+    return parsed
+
+
+def job_seeker_blocks(feedback, ats_scorecard, extracted_skills, recommendations=None, degraded=False):
+    sections = parse_feedback_sections(feedback, "No input available for this section.")
+    blocks = [
+        ("title", "Resume Analysis Report"),
+        ("subtitle", f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"),
+    ]
+    if degraded:
+        blocks.append(("text", "DEGRADED RESULT: AI feedback was unavailable; this report uses local ATS matching only."))
+    blocks += [
+        ("heading", "Executive Summary"),
+        ("text", sections["Summary"]),
+        ("heading", "Key Metrics"),
+        ("text", f"ATS Score: {ats_scorecard.get('overall_score', 'N/A')}/100"),
+        ("text", f"Hiring Probability: {ats_scorecard.get('hiring_probability', 'N/A')}%"),
+        ("text", f"Missing Skills: {len(extracted_skills) if extracted_skills else 0}"),
+        ("heading", "Detailed Analysis"),
+        ("text", sections["Analysis"]),
+        ("heading", "Missing Skills"),
+        ("text", sections["Missing"]),
+        ("heading", "ATS Scorecard"),
+    ]
+    explanations = ats_scorecard.get("explanations", {})
+    for category, score in ats_scorecard.get("scores", {}).items():
+        blocks.append(("text", f"{category}: {score}/100"))
+        blocks.append(("bullets", [explanations.get(category, "No explanation available.")]))
+    blocks.append(("heading", "Recommendations"))
+    for rec in recommendations or DEFAULT_RECOMMENDATIONS:
+        blocks.append(("text", rec))
+    return blocks
+
+
+def job_seeker_report(feedback, ats_scorecard, extracted_skills, recommendations=None, degraded=False):
+    """PDF bytes for the Job Seekers analysis."""
+    return render_blocks(job_seeker_blocks(feedback, ats_scorecard, extracted_skills, recommendations, degraded))
+
+
+# ----------------------------------
+# Recruiters reports
+# ----------------------------------
+def candidate_blocks(name, analysis):
+    blocks = [("footer", name), ("title", f"Resume Analysis Report — {name}")]
+    if analysis.get("degraded"):
+        blocks.append(("text", "DEGRADED RESULT: scored locally while the AI provider was unavailable."))
+    if analysis.get("duplicate_of"):
+        blocks.append(("text", f"Near-duplicate of {analysis['duplicate_of']}; analysis reused."))
+    blocks += [
+        ("heading", f"Score: {analysis.get('score', 0)}%"),
+        ("heading", "Matched Skills:"),
+        ("bullets", analysis.get("matched_skills") or []),
+        ("heading", "Missing Skills:"),
+        ("bullets", analysis.get("missing_skills") or []),
+        ("heading", "Reason:"),
+        ("text", analysis.get("reason") or "No reason provided."),
+    ]
+    ats = analysis.get("ats")
+    if ats:
+        blocks.append(("heading", f"ATS Score: {ats.get('overall_score', 'N/A')}/100"))
+        blocks.append(("bullets", [f"{c}: {s}/100" for c, s in ats.get("scores", {}).items()]))
+    return blocks
+
+
+def candidate_report(name, analysis):
+    """PDF bytes for a single screened candidate."""
+    return render_blocks(candidate_blocks(name, analysis), title=f"Report — {name}")
+
+
+def candidates_report(results):
+    """All candidates in one PDF, one candidate per page (or more if long)."""
+    blocks = []
+    for rank, (name, analysis) in enumerate(results, 1):
+        if blocks:
+            blocks.append(("page_break", None))
+        candidate = candidate_blocks(name, analysis)
+        candidate[0] = ("footer", f"#{rank} {name}")
+        candidate[1] = ("title", f"#{rank}. {name}")
+        blocks.extend(candidate)
+    return render_blocks(blocks or [("text", "No candidates.")], title="Candidate Reports")
+
+
+def candidates_zip(results):
+    """ZIP archive with one PDF per candidate."""
+    buffer = BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for rank, (name, analysis) in enumerate(results, 1):
+            stem = os.path.splitext(os.path.basename(name))[0]
+            zf.writestr(f"{rank:03d}_Report_{stem}.pdf", candidate_report(name, analysis))
+    return buffer.getvalue()
+
+
+# ----------------------------------
+# Benchmark
+# ----------------------------------
+def _bench(n):
+    analysis = {
+        "score": 78,
+        "matched_skills": ["Python", "SQL", "AWS", "Docker", "Data analysis — ETL"],
+        "missing_skills": ["Kubernetes", "React", "Go"],
+        "reason": "Strong backend experience with Python and SQL across several production systems. "
+                  "Cloud exposure is good but lacks container orchestration; front-end work is limited. " * 3,
+        "ats": {"overall_score": 64, "scores": {"Keyword Matching": 55, "Formatting": 80}},
+    }
+    results = [(f"candidate_{i:04d}_Zoë.pdf", analysis) for i in range(n)]
+
+    started = time.perf_counter()
+    for name, data in results:
+        candidate_report(name, data)
+    single = time.perf_counter() - started
+
+    started = time.perf_counter()
+    candidates_report(results)
+    batch = time.perf_counter() - started
+
+    print(f"font: {FONT} (unicode={UNICODE_FONT})")
+    print(f"{n} single reports: {single:.2f}s  ({n / single:.0f} reports/s)")
+    print(f"{n} candidates in one PDF: {batch:.2f}s  ({n / batch:.0f} reports/s)")
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Benchmark the report renderer.")
+    parser.add_argument("--bench", type=int, default=300, help="number of reports to render")
+    _bench(parser.parse_args().bench)
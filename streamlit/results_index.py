@@ -0,0 +1,109 @@
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+
+def _score(analysis):
+    try:
+        return float(analysis.get("score", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class ResultIndex:
+    """Precomputed ranking of screening results for paginated views.
+
+    Built once per result set. Candidates are kept in rank order (best score
+    first, ties by name), and each matched skill maps to the sorted list of
+    ranks that have it. A page query is then a couple of bisects plus a slice:
+
+    - score range -> contiguous rank interval ``[lo, hi)``
+    - required skill -> sub-slice of that skill's rank list within ``[lo, hi)``
+    - sort direction -> read the interval forwards or backwards
+
+    so cost per page does not grow with the pool size. With several required
+    skills the rarest skill's ranks are scanned and checked against the others.
+    """
+
+    def __init__(self, results):
+        order = sorted(range(len(results)), key=lambda i: (-_score(results[i][1]), results[i][0]))
+        self.results = [results[i] for i in order]
+        # Negated so the array is ascending and bisect-able.
+        self._neg_scores = [-_score(a) for _, a in self.results]
+
+        self._skill_ranks = {}
+        skill_counts = Counter()
+        for rank, (_, analysis) in enumerate(self.results):
+            for skill in {str(s).strip().lower() for s in analysis.get("matched_skills") or []}:
+                if skill:
+                    self._skill_ranks.setdefault(skill, []).append(rank)
+                    skill_counts[skill] += 1
+        self._skill_sets = {skill: set(ranks) for skill, ranks in self._skill_ranks.items()}
+        # Most common first: a sensible option order for a skills filter.
+        self.skills = [skill for skill, _ in skill_counts.most_common()]
+
+    def __len__(self):
+        return len(self.results)
+
+    def _score_interval(self, min_score, max_score):
+        lo = bisect_left(self._neg_scores, -max_score)
+        hi = bisect_right(self._neg_scores, -min_score)
+        return lo, hi
+
+    def _matching_ranks(self, min_score, max_score, skills):
+        """Ranks matching the filters as (sequence, total) without copying."""
+        lo, hi = self._score_interval(min_score, max_score)
+        skills = [s.strip().lower() for s in skills or [] if s.strip()]
+        if not skills:
+            return range(lo, hi), hi - lo
+        if any(s not in self._skill_ranks for s in skills):
+            return [], 0
+
+        def in_range(skill):
+            ranks = self._skill_ranks[skill]
+            return ranks, bisect_left(ranks, lo), bisect_left(ranks, hi)
+
+        if len(skills) == 1:
+            ranks, a, b = in_range(skills[0])
+            return _Slice(ranks, a, b), b - a
+
+        rarest = min(skills, key=lambda s: len(self._skill_ranks[s]))
+        ranks, a, b = in_range(rarest)
+        others = [self._skill_sets[s] for s in skills if s != rarest]
+        matched = [r for r in ranks[a:b] if all(r in other for other in others)]
+        return matched, len(matched)
+
+    def page(self, page=1, page_size=25, min_score=0, max_score=100, skills=None, descending=True):
+        """One page of ``(rank, name, analysis)`` plus the total number of matches.
+
+        ``rank`` is the 1-based overall rank (1 = best score) regardless of
+        filters and sort direction.
+        """
+        ranks, total = self._matching_ranks(min_score, max_score, skills)
+        start = max(0, (page - 1) * page_size)
+        stop = min(total, start + page_size)
+        if descending:
+            picked = [ranks[i] for i in range(start, stop)]
+        else:
+            picked = [ranks[total - 1 - i] for i in range(start, stop)]
+        return [(r + 1, *self.results[r]) for r in picked], total
+
+    def ordered(self, descending=True):
+        """All results in rank order (for bulk downloads)."""
+        return list(self.results) if descending else self.results[::-1]
+
+
+class _Slice:
+    """Indexable window over a list without copying it."""
+
+    __slots__ = ("_items", "_start", "_len")
+
+    def __init__(self, items, start, stop):
+        self._items = items
+        self._start = start
+        self._len = stop - start
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, i):
+        return self._items[self._start + i]
@@ -0,0 +1,198 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from io import BytesIO
+
+from ats import generate_ats_scorecard
+from llm_client import warm_connection
+
+# ----------------------------------
+# Process-wide worker pool and analysis cache
+# ----------------------------------
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative")
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def text_hash(text):
+    return hashlib.sha256((text or "").encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """Thread-safe LRU of LLM results keyed by (kind, model, resume hash, JD hash)."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+analysis_cache = AnalysisCache()
+
+
+def cache_key(kind, model, resume_hash, jd_hash):
+    return (kind, model, resume_hash, jd_hash)
+
+
+class Prepared:
+    """Everything the Analyze click needs, computed ahead of time."""
+
+    __slots__ = ("name", "content_hash", "jd_hash", "text", "extract_seconds", "ats", "cached")
+
+    def __init__(self, name, content_hash, jd_hash, text, extract_seconds, ats=None, cached=None):
+        self.name = name
+        self.content_hash = content_hash
+        self.jd_hash = jd_hash
+        self.text = text
+        self.extract_seconds = extract_seconds
+        self.ats = ats
+        self.cached = cached
+
+
+# ----------------------------------
+# Per-session speculation
+# ----------------------------------
+class Speculator:
+    """Starts extraction/scoring in the background as soon as inputs appear.
+
+    Call ``update`` on every rerun with the current uploads and JD. Work is
+    keyed by content, so unchanged files are never redone. Work for files or
+    JDs that are no longer on screen is cancelled (queued tasks) or discarded
+    at the next stage boundary (running tasks). ``prepare`` then returns the
+    finished result, or does the work inline if it has not started yet.
+    """
+
+    def __init__(self, extract, kind, model):
+        self._extract = extract    # (file-like with .name) -> str
+        self._kind = kind          # analysis cache namespace, e.g. "recruiter"
+        self._model = model
+        self._lock = threading.Lock()
+        self._texts = {}           # content hash -> Future[(text, seconds)]
+        self._scores = {}          # (content hash, jd hash) -> Future[(ats, cached)]
+        self._file_hashes = {}     # UploadedFile.file_id -> content hash
+        self._jd_hash = None
+
+    def _content_hash(self, f):
+        """Content hash of an upload, computed once per ``file_id``.
+
+        Hashing the full upload on every rerun would make each page, filter
+        or sort click cost the size of the batch.
+        """
+        file_id = getattr(f, "file_id", None)
+        if file_id is None:
+            return content_hash(f.getvalue())
+        h = self._file_hashes.get(file_id)
+        if h is None:
+            h = self._file_hashes[file_id] = content_hash(f.getvalue())
+        return h
+
+    def _extract_task(self, name, data):
+        started = time.perf_counter()
+        f = BytesIO(data)
+        f.name = name
+        text = self._extract(f)
+        return text, time.perf_counter() - started
+
+    def _score_task(self, text_future, job_desc, resume_hash, jd_hash):
+        text, _ = text_future.result()
+        if self._jd_hash != jd_hash:
+            return None  # JD changed while we waited on extraction
+        cached = analysis_cache.get(cache_key(self._kind, self._model, resume_hash, jd_hash))
+        ats = generate_ats_scorecard(text, job_desc) if text.strip() else None
+        return ats, cached
+
+    def update(self, files, job_desc=None):
+        """Sync speculative work with the current inputs (call on every rerun)."""
+        files = [f for f in files or [] if f is not None]
+        jd_hash = text_hash(job_desc) if job_desc else None
+        with self._lock:
+            wanted = {}
+            for f in files:
+                h = self._content_hash(f)
+                wanted[h] = True
+                if h not in self._texts:
+                    self._texts[h] = _executor.submit(self._extract_task, f.name, f.getvalue())
+            current_ids = {getattr(f, "file_id", None) for f in files}
+            for file_id in list(self._file_hashes):
+                if file_id not in current_ids:
+                    del self._file_hashes[file_id]
+
+            self._jd_hash = jd_hash
+            for h in list(self._texts):
+                if h not in wanted:
+                    self._texts.pop(h).cancel()
+            for key in list(self._scores):
+                if key[0] not in wanted or key[1] != jd_hash:
+                    self._scores.pop(key).cancel()
+
+            if jd_hash is not None:
+                for h in wanted:
+                    if (h, jd_hash) not in self._scores:
+                        self._scores[(h, jd_hash)] = _executor.submit(
+                            self._score_task, self._texts[h], job_desc, h, jd_hash)
+
+        if files:
+            # The user is about to click Analyze; have a live connection ready.
+            _executor.submit(warm_connection)
+
+    def prepare(self, f, job_desc):
+        """Block until ``f`` is ready for the LLM call and return a ``Prepared``."""
+        with self._lock:
+            h = self._content_hash(f)
+        jd_hash = text_hash(job_desc)
+        with self._lock:
+            text_future = self._texts.get(h)
+            score_future = self._scores.get((h, jd_hash))
+
+        # A future still queued behind other sessions' work is cancelled and
+        # done inline, so the click never waits on the shared pool.
+        if text_future is None or text_future.cancel():
+            text, seconds = self._extract_task(f.name, f.getvalue())
+            done = Future()
+            done.set_result((text, seconds))
+            with self._lock:
+                if h in self._texts:
+                    self._texts[h] = done  # later reruns reuse the inline result
+        else:
+            try:
+                text, seconds = text_future.result()
+            except CancelledError:
+                text, seconds = self._extract_task(f.name, f.getvalue())
+
+        scored = None
+        if score_future is not None and not score_future.cancel():
+            try:
+                scored = score_future.result()
+            except CancelledError:
+                scored = None
+        if scored is None:
+            ats = generate_ats_scorecard(text, job_desc) if text.strip() else None
+            cached = None
+        else:
+            ats, cached = scored
+        if cached is None:
+            # A result may have landed in the cache after the speculative lookup.
+            cached = analysis_cache.get(cache_key(self._kind, self._model, h, jd_hash))
+        return Prepared(f.name, h, jd_hash, text, seconds, ats, cached)
+
+    def remember(self, prepared, analysis):
+        """Store a fresh LLM result so identical inputs skip the call next time."""
+        analysis_cache.put(cache_key(self._kind, self._model, prepared.content_hash, prepared.jd_hash), analysis)
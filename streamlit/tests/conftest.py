@@ -0,0 +1,8 @@
+import os
+import sys
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Shared modules live next to app.py; the mock server lives in tools/.
+for path in (APP_DIR, os.path.join(APP_DIR, "tools")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,150 @@
+"""Hedged routing against local mock servers (see tools/mock_llm_server.py)."""
+import time
+
+import pytest
+import requests
+
+from llm_providers import Endpoint, HedgedRouter, endpoints_from_config
+from llm_scheduler import BULK, LLMScheduler
+from mock_llm_server import start_mock_server
+
+PAYLOAD = {"model": "mock", "messages": [{"role": "user", "content": "Return STRICT JSON ONLY."}]}
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(**config):
+        server, url = start_mock_server(**config)
+        started.append(server)
+        return url
+
+    yield start
+    for server in started:
+        server.shutdown()
+
+
+def make_router(urls, scheduler=None, **options):
+    # min_samples is high so every request uses default_hedge_delay; equal
+    # sample counts keep the endpoints in the order given.
+    options.setdefault("min_samples", 10 ** 6)
+    endpoints = [Endpoint(f"e{i}", url, api_key="mock-key") for i, url in enumerate(urls)]
+    return HedgedRouter(endpoints, http=requests.Session(), scheduler=scheduler, **options)
+
+
+def unbounded_scheduler(max_concurrency=4):
+    return LLMScheduler(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9, max_concurrency=max_concurrency)
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return predicate()
+
+
+def test_hedge_wins_when_primary_stalls(servers):
+    slow = servers(latency=1.0)
+    fast = servers(latency=0.01)
+    router = make_router([slow, fast], default_hedge_delay=0.1)
+
+    started = time.monotonic()
+    response, endpoint = router.post(PAYLOAD, "mock-key", timeout=5)
+
+    assert response.status_code == 200
+    assert endpoint.name == "e1"
+    assert time.monotonic() - started < 0.8
+    assert (router.hedges_sent, router.hedges_won) == (1, 1)
+
+
+def test_fails_over_at_once_on_503(servers):
+    broken = servers(latency=0.01, error_rate=1.0)
+    healthy = servers(latency=0.01)
+    router = make_router([broken, healthy], default_hedge_delay=5.0)
+
+    started = time.monotonic()
+    response, endpoint = router.post(PAYLOAD, "mock-key", timeout=5)
+
+    assert response.status_code == 200
+    assert endpoint.name == "e1"
+    assert time.monotonic() - started < 1.0  # did not wait out the hedge delay
+
+
+def test_returns_last_failure_when_every_endpoint_fails(servers):
+    urls = [servers(latency=0.01, error_rate=1.0) for _ in range(2)]
+    router = make_router(urls, default_hedge_delay=5.0)
+
+    response, _ = router.post(PAYLOAD, "mock-key", timeout=5)
+
+    assert response.status_code == 503
+
+
+def test_loser_holds_its_ticket_until_it_returns(servers):
+    slow = servers(latency=0.6)
+    fast = servers(latency=0.01)
+    scheduler = unbounded_scheduler()
+    router = make_router([slow, fast], scheduler=scheduler, default_hedge_delay=0.1)
+
+    primary, ticket = router.admit("s", BULK, 100)
+    response, endpoint = router.post(PAYLOAD, "mock-key", 5, primary, ticket)
+
+    assert endpoint.name == "e1"
+    assert scheduler.metrics()["hedges_admitted"] == 1
+    assert scheduler.metrics()["in_flight"] == 1  # the stalled primary is still out
+    assert wait_for(lambda: scheduler.metrics()["in_flight"] == 0)
+    budgets = scheduler.metrics()["budgets"]
+    assert budgets["e0"]["requests_last_minute"] == 1
+    assert budgets["e1"]["requests_last_minute"] == 1
+
+
+def test_hedge_skipped_without_spare_capacity(servers):
+    slow = servers(latency=0.4)
+    fast = servers(latency=0.01)
+    scheduler = unbounded_scheduler(max_concurrency=1)
+    router = make_router([slow, fast], scheduler=scheduler, default_hedge_delay=0.05)
+
+    primary, ticket = router.admit("s", BULK, 100)
+    response, endpoint = router.post(PAYLOAD, "mock-key", 5, primary, ticket)
+
+    assert endpoint.name == "e0"
+    assert router.hedges_sent == 0 and router.hedges_skipped == 1
+    assert wait_for(lambda: scheduler.metrics()["in_flight"] == 0)
+
+
+def test_throttled_endpoint_is_skipped_by_admit(servers):
+    urls = [servers(latency=0.01) for _ in range(2)]
+    scheduler = unbounded_scheduler()
+    router = make_router(urls, scheduler=scheduler)
+    scheduler.update_from_headers({"retry-after": "30"}, 429, budget="e0")
+
+    started = time.monotonic()
+    primary, ticket = router.admit("s", BULK, 100)
+    router.release(ticket)
+
+    assert primary.name == "e1"
+    assert time.monotonic() - started < 0.5
+
+
+def test_queued_ticket_for_throttled_endpoint_does_not_block_others():
+    scheduler = unbounded_scheduler()
+    scheduler.update_from_headers({"retry-after": "30"}, 429, budget="groq")
+
+    with pytest.raises(TimeoutError):
+        scheduler.acquire("a", BULK, 10, timeout=0.1, budget="groq")
+    ticket = scheduler.acquire("b", BULK, 10, timeout=0.5, budget="backup")
+
+    assert ticket.budget == "backup"
+    scheduler.release(ticket)
+
+
+def test_endpoint_config_requires_own_key_or_inherit_key():
+    with pytest.raises(ValueError):
+        endpoints_from_config('[{"name": "backup", "url": "http://localhost/v1"}]')
+    inherited, own = endpoints_from_config(
+        '[{"name": "groq", "url": "http://a", "inherit_key": true},'
+        ' {"name": "backup", "url": "http://b", "api_key": "backup-key"}]')
+    assert inherited.key_for("groq-key") == "groq-key"
+    assert own.key_for("groq-key") == "backup-key"
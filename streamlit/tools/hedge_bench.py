@@ -0,0 +1,98 @@
+"""Tail-latency benchmark for hedged routing against local mock servers.
+
+Starts mock OpenAI-compatible endpoints that occasionally stall, then sends
+the same request stream through ``chat_completion`` (scheduler, breaker and
+router, as in production) with:
+  1. a single endpoint (no hedging), and
+  2. all endpoints (hedged),
+and prints p50/p95/p99 for both. Endpoints are installed with
+``set_endpoints()`` on a scheduler with the production concurrency cap but no
+rate limits (the mocks have none). Hedges only use spare slots, so keep
+``--concurrency`` below ``--max-concurrency`` to leave room for them.
+
+Usage (from the repo root):
+    python streamlit/tools/hedge_bench.py --requests 1000 --slow-rate 0.05 --slow-latency 2
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, APP_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import circuit_breaker  # noqa: E402
+import llm_client  # noqa: E402
+import llm_scheduler  # noqa: E402
+from llm_providers import HEDGE_PERCENTILE, Endpoint  # noqa: E402
+from mock_llm_server import start_mock_server  # noqa: E402
+
+PAYLOAD = {"model": "mock", "messages": [{"role": "user", "content": "Return STRICT JSON ONLY."}]}
+
+
+def _percentiles(samples):
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(p * len(samples)))]
+    return pick(0.5), pick(0.95), pick(0.99)
+
+
+def install(endpoints, max_concurrency, **router_options):
+    """Fresh scheduler/breaker and a router over ``endpoints`` via set_endpoints()."""
+    llm_scheduler._scheduler = llm_scheduler.LLMScheduler(
+        requests_per_minute=10 ** 9, tokens_per_minute=10 ** 12, max_concurrency=max_concurrency)
+    circuit_breaker._breaker = circuit_breaker.CircuitBreaker()
+    return llm_client.set_endpoints(endpoints, **router_options)
+
+
+def run(n, concurrency):
+    def one(i):
+        started = time.monotonic()
+        response = llm_client.chat_completion(PAYLOAD, "mock-key", session_id=f"bench-{i % concurrency}")
+        response.raise_for_status()
+        return time.monotonic() - started
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(one, range(n)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--endpoints", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=2, help="parallel callers")
+    parser.add_argument("--max-concurrency", type=int, default=llm_scheduler.DEFAULT_MAX_CONCURRENCY,
+                        help="scheduler concurrency cap (hedges and losers included)")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.03)
+    parser.add_argument("--slow-rate", type=float, default=0.05)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--hedge-percentile", type=float, default=HEDGE_PERCENTILE)
+    args = parser.parse_args(argv)
+
+    urls = []
+    for i in range(args.endpoints):
+        _, url = start_mock_server(latency=args.latency, jitter=args.jitter, slow_rate=args.slow_rate,
+                                   slow_latency=args.slow_latency, seed=i)
+        urls.append(url)
+
+    setups = (
+        ("single endpoint", [Endpoint("single", urls[0], api_key="mock-key")]),
+        ("hedged", [Endpoint(f"mock{i}", url, api_key="mock-key") for i, url in enumerate(urls)]),
+    )
+    for label, endpoints in setups:
+        router = install(endpoints, args.max_concurrency, hedge_percentile=args.hedge_percentile,
+                         default_hedge_delay=args.latency * 4)
+        run(args.concurrency * 10, args.concurrency)  # warm up histograms/connections
+        latencies = run(args.requests, args.concurrency)
+        p50, p95, p99 = _percentiles(latencies)
+        print(f"{label:<16} p50 {p50 * 1000:7.1f} ms   p95 {p95 * 1000:7.1f} ms   p99 {p99 * 1000:7.1f} ms")
+    print(f"hedges sent {router.hedges_sent}, won {router.hedges_won}, skipped {router.hedges_skipped}")
+    for name, stats in router.metrics().items():
+        if isinstance(stats, dict):
+            print(f"  {name}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
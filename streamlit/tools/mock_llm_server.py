@@ -0,0 +1,138 @@
+"""Local OpenAI-compatible mock server with configurable latency.
+
+Answers ``POST /v1/chat/completions`` (any path, in fact) with a canned
+completion: strict JSON for Recruiters-style prompts, markdown feedback
+otherwise. Latency is ``--latency`` plus up to ``--jitter`` seconds, and a
+``--slow-rate`` fraction of requests takes ``--slow-latency`` instead.
+``--error-rate`` returns 503s.
+
+Run standalone and point the app at it:
+    python streamlit/tools/mock_llm_server.py --port 8701 --latency 0.3 --slow-rate 0.05
+    ECHOSAGE_LLM_ENDPOINTS='[{"name": "mock", "url": "http://127.0.0.1:8701/v1/chat/completions", "api_key": "mock"}]' \\
+        streamlit run streamlit/app.py
+
+or start in-process from a script with ``start_mock_server(...)``.
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RECRUITER_CONTENT = {
+    "score": 72,
+    "matched_skills": ["Python", "SQL"],
+    "missing_skills": ["Docker"],
+    "reason": "Mock response from the local test server.",
+}
+
+FEEDBACK_CONTENT = """### Resume Feedback Summary
+Mock feedback from the local test server.
+
+### Detailed Analysis
+1. **Strengths**:
+   - Python
+2. **Weaknesses**:
+   - Docker
+
+### Missing Skills or Keywords
+* Docker: Important - Mock entry
+
+### Suggestions to Improve
+1. Mention containerisation.
+
+### Additional Recommendations
+None.
+"""
+
+
+class MockConfig:
+    def __init__(self, latency=0.2, jitter=0.0, slow_rate=0.0, slow_latency=5.0, error_rate=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def next_delay(self):
+        with self.lock:
+            self.requests += 1
+            if self.random.random() < self.slow_rate:
+                return self.slow_latency, False
+            failed = self.random.random() < self.error_rate
+            return self.latency + self.random.random() * self.jitter, failed
+
+
+def _make_handler(config):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            delay, failed = config.next_delay()
+            time.sleep(delay)
+            if failed:
+                self._send(503, {"error": {"message": "mock overload"}})
+                return
+            prompt = " ".join(m.get("content", "") for m in payload.get("messages", []))
+            content = json.dumps(RECRUITER_CONTENT) if "STRICT JSON" in prompt else FEEDBACK_CONTENT
+            self._send(200, {
+                "model": payload.get("model"),
+                "choices": [{"message": {"role": "assistant", "content": content}}],
+                "usage": {"total_tokens": len(prompt) // 4 + 100},
+            })
+
+    return Handler
+
+
+def start_mock_server(port=0, **config):
+    """Start a mock server on a daemon thread; returns ``(server, url)``."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), _make_handler(MockConfig(**config)))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mock OpenAI-compatible chat completions server.")
+    parser.add_argument("--port", type=int, default=8701)
+    parser.add_argument("--latency", type=float, default=0.2, help="base latency (s)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra uniform latency (s)")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="fraction of very slow requests")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="latency of slow requests (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of 503 responses")
+    args = parser.parse_args(argv)
+    server, url = start_mock_server(args.port, latency=args.latency, jitter=args.jitter,
+                                    slow_rate=args.slow_rate, slow_latency=args.slow_latency,
+                                    error_rate=args.error_rate)
+    print(f"Mock LLM endpoint: {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
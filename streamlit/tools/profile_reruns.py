@@ -0,0 +1,346 @@
+"""Rerun-latency profiling harness for the EchoSage Streamlit pages.
+
+Drives ``app.py``, ``pages/1_Job_Seekers.py`` and ``pages/2_Recruiters.py``
+headlessly with ``streamlit.testing.v1.AppTest``. Groq calls are stubbed and
+file uploads are simulated, so only Streamlit rerun cost is measured: parsing
+feedback, building charts, rendering PDFs and result cards.
+
+Each rerun records wall time, peak Python allocations (tracemalloc) and a
+cProfile of the script thread; over-budget reruns also get a per-line
+tracemalloc breakdown. The LLM scheduler, breaker and router are replaced by
+fresh, unthrottled instances, so the stubbed calls are never paced by the
+free-tier rate limits. The run exits non-zero when a rerun goes over budget.
+Timings include profiler overhead, so compare runs made with this harness
+rather than comparing against production numbers.
+
+Usage (from the repo root):
+    python streamlit/tools/profile_reruns.py
+    python streamlit/tools/profile_reruns.py --pages recruiters --resumes 100 --budget-ms 800
+"""
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack
+from unittest import mock
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from streamlit.testing.v1 import AppTest
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Pages import shared modules (llm_client, ats, ...) that live next to app.py.
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+JOB_DESCRIPTION = """We are hiring a Python developer with experience in SQL, AWS, Docker and
+machine learning. A bachelor degree in computer science is required; React and
+data analysis are a plus."""
+
+FEEDBACK = """### Resume Feedback Summary
+Strong backend profile with solid Python experience — a good match overall.
+
+### Detailed Analysis
+1. **Strengths**:
+   - Python and SQL in production
+   - Cloud deployments on AWS
+2. **Weaknesses**:
+   - Little front-end work
+
+### Missing Skills or Keywords
+* Docker: Critical - Containerisation is core to the role
+* React: Important - Needed for internal tooling
+* Data analysis: Nice-to-have - Occasional reporting
+
+### Suggestions to Improve
+1. Quantify the impact of backend projects
+2. Mention Docker usage explicitly
+3. Add a short skills summary
+
+### Additional Recommendations
+Keep the resume to two pages.
+"""
+
+
+# ----------------------------------
+# Stubs
+# ----------------------------------
+def _fake_response(payload):
+    """Canned chat completion: strict JSON for recruiters, markdown for job seekers."""
+    prompt = " ".join(m.get("content", "") for m in payload.get("messages", []))
+    if "STRICT JSON" in prompt:
+        # Vary the score so ranking has something to sort.
+        score = 40 + (len(prompt) * 7919) % 60
+        content = json.dumps({
+            "score": score,
+            "matched_skills": ["Python", "SQL", "AWS"],
+            "missing_skills": ["Docker", "React"],
+            "reason": "Solid backend experience. Lacks containerisation and front-end work.",
+        })
+    else:
+        content = FEEDBACK
+    response = requests.Response()
+    response.status_code = 200
+    response.headers = CaseInsensitiveDict({"content-type": "application/json"})
+    response._content = json.dumps({
+        "choices": [{"message": {"content": content}}],
+        "usage": {"total_tokens": len(prompt) // 4 + 200},
+    }).encode()
+    return response
+
+
+def _stub_request(self, method, url, **kwargs):
+    return _fake_response(kwargs.get("json") or {})
+
+
+class FakeUpload(io.BytesIO):
+    """Stands in for streamlit's UploadedFile."""
+
+    def __init__(self, name, data, mime):
+        super().__init__(data)
+        self.name = name
+        self.type = mime
+        self.size = len(data)
+        self.file_id = f"{name}-{len(data)}"
+
+
+def make_docx(name, index):
+    from docx import Document
+    doc = Document()
+    doc.add_heading(f"Candidate {index}", 0)
+    doc.add_heading("Experience", 1)
+    doc.add_paragraph(f"Developed Python services and SQL pipelines on AWS for {3 + index % 7} years.")
+    doc.add_paragraph(f"Managed projects with {index % 5 + 2} engineers; worked on machine learning models.")
+    doc.add_heading("Education", 1)
+    doc.add_paragraph("Bachelor degree in Computer Science, State University.")
+    doc.add_heading("Skills", 1)
+    doc.add_paragraph(", ".join(["Python", "SQL", "AWS", "Java", "Azure"][: 2 + index % 4]))
+    buf = io.BytesIO()
+    doc.save(buf)
+    return FakeUpload(name, buf.getvalue(),
+                      "application/vnd.openxmlformats-officedocument.wordprocessingml.document")
+
+
+class UploadStub:
+    """Replacement for ``st.file_uploader`` (AppTest cannot drive uploads)."""
+
+    def __init__(self):
+        self.files = None
+
+    def __call__(self, label, *args, **kwargs):
+        if kwargs.get("key") == "restore_file":
+            return None
+        if self.files is None:
+            return [] if kwargs.get("accept_multiple_files") else None
+        for f in self.files if isinstance(self.files, list) else [self.files]:
+            f.seek(0)
+        return self.files
+
+
+def isolate_llm_state():
+    """Fresh breaker/router and a scheduler without rate limits for this process.
+
+    The HTTP layer is stubbed, but calls still pass through the process-wide
+    LLMScheduler; with its free-tier defaults a 25-resume batch would wait a
+    minute for the token window and measure the scheduler, not the rerun.
+    """
+    import circuit_breaker
+    import llm_client
+    import llm_scheduler
+    llm_scheduler._scheduler = llm_scheduler.LLMScheduler(
+        requests_per_minute=10 ** 9, tokens_per_minute=10 ** 12, max_concurrency=16)
+    circuit_breaker._breaker = circuit_breaker.CircuitBreaker()
+    llm_client._router = None  # rebuilt against the scheduler above on first use
+
+
+# ----------------------------------
+# Scenarios
+# ----------------------------------
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def scenario_home(at, uploads, args):
+    yield "initial load", lambda: None
+    yield "select Job Seekers", lambda: _button(at, "Job Seekers").click()
+    yield "select Recruiters", lambda: _button(at, "Recruiters").click()
+    yield "select Interview Prep", lambda: _button(at, "Interview Prep").click()
+
+
+def scenario_job_seekers(at, uploads, args):
+    yield "initial load", lambda: None
+    uploads.files = make_docx("resume.docx", 1)
+    yield "upload resume", lambda: None
+    yield "enter job description", lambda: at.text_area[0].input(JOB_DESCRIPTION)
+    yield "run analysis", lambda: _button(at, "Run Comprehensive Analysis").click()
+    yield "idle rerun with results", lambda: None
+    yield "idle rerun with results (2)", lambda: None
+
+
+def scenario_recruiters(at, uploads, args):
+    yield "initial load", lambda: None
+    uploads.files = [make_docx(f"resume_{i:03d}.docx", i) for i in range(args.resumes)]
+    yield f"upload {args.resumes} resumes", lambda: None
+    yield "enter job description", lambda: at.text_area[0].input(JOB_DESCRIPTION)
+    yield "analyze", lambda: _button(at, "🔍 Analyze").click()
+    yield "sort ascending", lambda: at.sidebar.radio[0].set_value("Ascending (Least → Best)")
+    yield "sort descending", lambda: at.sidebar.radio[0].set_value("Descending (Best → Least)")
+    yield "idle rerun with results", lambda: None
+
+
+PAGES = {
+    "home": ("app.py", scenario_home),
+    "job_seekers": (os.path.join("pages", "1_Job_Seekers.py"), scenario_job_seekers),
+    "recruiters": (os.path.join("pages", "2_Recruiters.py"), scenario_recruiters),
+}
+
+
+# ----------------------------------
+# Measurement
+# ----------------------------------
+class RerunProfiler:
+    """cProfile for the AppTest script thread.
+
+    AppTest executes the page on its own thread, so the profiler is switched
+    on inside ``ScriptRunner._run_script`` instead of around ``at.run()``.
+    """
+
+    def __init__(self):
+        self.profile = None
+
+    def patch(self):
+        from streamlit.runtime.scriptrunner.script_runner import ScriptRunner
+        original = ScriptRunner._run_script
+        profiler = self
+
+        def _run_script(runner, *args, **kwargs):
+            profile = profiler.profile
+            if profile is None:
+                return original(runner, *args, **kwargs)
+            profile.enable()
+            try:
+                return original(runner, *args, **kwargs)
+            finally:
+                profile.disable()
+
+        return mock.patch.object(ScriptRunner, "_run_script", _run_script)
+
+
+def profile_page(page, args, profiler):
+    script, scenario = PAGES[page]
+    uploads = UploadStub()
+    at = AppTest.from_file(os.path.join(APP_DIR, script), default_timeout=args.timeout)
+    at.secrets["GROQ_API_KEY"] = "stub-key"
+
+    records = []
+    with mock.patch("streamlit.file_uploader", uploads):
+        for step, action in scenario(at, uploads, args):
+            if records:  # the very first run has no widgets to act on yet
+                action()
+            profiler.profile = cProfile.Profile()
+            tracemalloc.start()
+            started = time.perf_counter()
+            at.run()
+            wall_ms = (time.perf_counter() - started) * 1000
+            _, peak = tracemalloc.get_traced_memory()
+            peak_mb = peak / 2 ** 20
+            allocations = None
+            if wall_ms > args.budget_ms or peak_mb > args.budget_mb:
+                allocations = _top_allocations(tracemalloc.take_snapshot(), args.top)
+            tracemalloc.stop()
+            records.append({
+                "page": page,
+                "step": step,
+                "wall_ms": wall_ms,
+                "peak_mb": peak_mb,
+                "exceptions": [e.message for e in at.exception],
+                "allocations": allocations,
+                "profile": profiler.profile,
+            })
+            profiler.profile = None
+    return records
+
+
+def _top_allocations(snapshot, top):
+    """Largest allocation sites still live at the end of the rerun."""
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ])
+    return [
+        {"site": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+         "size_kb": stat.size / 1024, "count": stat.count}
+        for stat in snapshot.statistics("lineno")[:top]
+    ]
+
+
+def _print_allocations(allocations):
+    print("      top allocation sites (live at end of rerun):")
+    for a in allocations:
+        print(f"      {a['size_kb']:>10.1f} KiB {a['count']:>8} blocks  {a['site']}")
+
+
+def _print_profile(profile, top):
+    out = io.StringIO()
+    pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+    lines = [l for l in out.getvalue().splitlines() if l.strip()]
+    print("\n".join("      " + l for l in lines[-(top + 1):]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="+", choices=sorted(PAGES), default=list(PAGES))
+    parser.add_argument("--resumes", type=int, default=25, help="resumes uploaded on the Recruiters page")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="max wall time per rerun")
+    parser.add_argument("--budget-mb", type=float, default=200.0, help="max peak allocation per rerun")
+    parser.add_argument("--top", type=int, default=12, help="cProfile rows shown per over-budget/slowest rerun")
+    parser.add_argument("--timeout", type=float, default=120.0, help="AppTest timeout per rerun (s)")
+    parser.add_argument("--json", dest="json_path", help="also write the per-rerun records here")
+    args = parser.parse_args(argv)
+
+    isolate_llm_state()
+    profiler = RerunProfiler()
+    records = []
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch("requests.sessions.Session.request", _stub_request))
+        stack.enter_context(profiler.patch())
+        for page in args.pages:
+            records.extend(profile_page(page, args, profiler))
+
+    failures = 0
+    print(f"{'page':<12} {'step':<32} {'wall ms':>9} {'peak MB':>9}")
+    for page in args.pages:
+        page_records = [r for r in records if r["page"] == page]
+        slowest = max(page_records, key=lambda r: r["wall_ms"])
+        for r in page_records:
+            over = r["wall_ms"] > args.budget_ms or r["peak_mb"] > args.budget_mb
+            flag = "  OVER BUDGET" if over else ""
+            print(f"{page:<12} {r['step']:<32} {r['wall_ms']:>9.1f} {r['peak_mb']:>9.2f}{flag}")
+            for message in r["exceptions"]:
+                print(f"    ! exception: {message}")
+            if over or r["exceptions"]:
+                failures += 1
+            if over or r is slowest:
+                _print_profile(r["profile"], args.top)
+            if r["allocations"]:
+                _print_allocations(r["allocations"])
+
+    if args.json_path:
+        with open(args.json_path, "w") as fh:
+            json.dump([{k: v for k, v in r.items() if k != "profile"} for r in records], fh, indent=2)
+
+    if failures:
+        print(f"\n{failures} rerun(s) over budget or raised an exception.")
+        return 1
+    print("\nAll reruns within budget.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())